@@ -5,10 +5,32 @@
 
 import streamlit as st
 import plotly.express as px
-from utils.load import load_data
+from utils.aggregate import memoized
+from utils.append import append_sidebar
+from utils.chart import cached_figure
+from utils.correlation import CORRELATION_GROUPS
+from utils.distinct import DISTINCT_GROUPS, PERIOD_GROUP
+from utils.filters import filter_sidebar
+from utils.forecast import FORECAST_GROUPS, FORECAST_POLL_SECONDS
+from utils.jobs import UPLOAD_STEPS, step_ready
+from utils.load import load_data, upload_job
+from utils.logistics import LOGISTICS_GROUPS, SHIP_TARGET_DAYS
+from utils.outliers import OUTLIER_GROUPS
+from utils.parallel import PARALLEL_MIN_ROWS, precompute
+from utils.perf import performance_panel, stage, start_run
 from utils.recommend import generate_recommendations
+from utils.timeseries import FREQUENCIES
 
 from utils.calculate import *
+
+start_run()
+
+
+def plot(fig, container=st):
+    """Render a Plotly figure, timing its serialization and transfer."""
+    with stage(f"chart: {fig.layout.title.text or 'untitled'}"):
+        container.plotly_chart(fig, width="stretch")
+
 # ================================================================
 # 🎨 THEME CONFIGURATION
 # ================================================================
@@ -33,6 +55,15 @@ THEMES = {
 selected_theme = st.sidebar.selectbox("Choose Theme", list(THEMES.keys()))
 colors = THEMES[selected_theme]
 
+
+def chart(chart_id, build, *params):
+    """
+    Figure from build(), cached for the current dataset view (filters give
+    it its own version), theme and the widget values in params.
+    """
+    return cached_figure(df, (chart_id, selected_theme, *params), build)
+
+
 # Inject CSS dynamically based on chosen theme
 st.markdown(
     f"""
@@ -84,29 +115,66 @@ with st.expander("Project Overview & Outcome"):
 # ================================================================
 # 🧩 DATA LOADING SECTION
 # ================================================================
-df = load_data()
-
+with stage("load_data"):
+    df = load_data()
 if df is not None:
+    df = append_sidebar(df)
+    with stage("filters", rows_in=len(df)) as record:
+        df = filter_sidebar(df)
+        record["rows_out"] = len(df)
+job = upload_job()
+
+
+def ready(step=None):
+    """
+    False, with a placeholder, while the upload job is still warming the
+    aggregates for step (None: every step); the page reruns when it's done.
+    """
+    if step_ready(job, df, step):
+        return True
+    label = UPLOAD_STEPS[step].lower() if step else "the full analysis"
+    st.info(f"⏳ Preparing {label} in the background…")
+    return False
+
+
+if df is not None and not df.empty:
+    if st.sidebar.checkbox(
+        "⚡ Parallel aggregation",
+        value=False,
+        help=f"Aggregate datasets of {PARALLEL_MIN_ROWS:,}+ rows across CPU cores.",
+    ):
+        partition_by = st.sidebar.selectbox("Partition by", ["Order ID hash", "Order year"])
+        with stage("parallel_precompute", rows_in=len(df)):
+            precompute(df, mode="order" if partition_by == "Order ID hash" else "year")
+    distinct_mode = "hll" if st.sidebar.selectbox(
+        "Distinct counts",
+        ["Exact", "Approximate (HyperLogLog)"],
+        help="Approximate counts use mergeable sketches, within about 1% of the exact value.",
+    ).startswith("Approximate") else "exact"
+
     st.success("Data successfully loaded and validated!")
 
     # ============================================================
     # 📈 KPI SECTION
     # ============================================================
-    kpis = get_basic_kpis(df)
-    profit_margin = get_profit_margin(df)  # ➕ compute margin
     st.subheader("Key Performance Indicators")
+    if ready("kpis"):
+        kpis = get_basic_kpis(df, distinct_mode)
+        profit_margin = get_profit_margin(df)  # ➕ compute margin
 
-    col1, col2, col3, col4, col5 = st.columns(5)
-    col1.metric("Total Sales", f"${kpis['total_sales']:,.0f}")
-    col2.metric("Total Profit", f"${kpis['total_profit']:,.0f}")
-    col3.metric("Profit Margin", f"{profit_margin:.2f}%")        # ➕ new KPI
-    col4.metric("Avg Discount", f"{kpis['avg_discount']:.2%}")
-    col5.metric("Total Orders", kpis['total_orders'])
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Total Sales", f"${kpis['total_sales']:,.0f}")
+        col2.metric("Total Profit", f"${kpis['total_profit']:,.0f}")
+        col3.metric("Profit Margin", f"{profit_margin:.2f}%")        # ➕ new KPI
+        col4.metric("Avg Discount", f"{kpis['avg_discount']:.2%}")
+        col5.metric("Total Orders", kpis['total_orders'])
 
     # ============================================================
     #  DASHBOARD TABS
     # ============================================================
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
+    # Only the open tab runs; switching tabs reruns the script and the
+    # calculations are memoized per dataset version.
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
         "📅 Overview",
         "📦 Category Insights",
         "🗺️ Regional Analysis",
@@ -114,8 +182,10 @@ if df is not None:
         "👥 Segment Analysis",
         "📊 Correlation Matrix",
         "🚨 Outlier Detection",     
+        "🚚 Logistics",
+        "🔮 Forecast",
         "💡 Recommendations"
-    ])
+    ], key="active_tab", on_change="rerun")
 
 
 
@@ -123,267 +193,340 @@ if df is not None:
     # TAB 1: Overview
     # ----------------------------------------------------------------
     with tab1:
-        st.markdown("### Sales Overview")
-
-        # Sales trend over time
-        trend = sales_trend(df)
-        fig1 = px.line(
-            trend,
-            x="Order Date",
-            y="Sales",
-            title="Sales Over Time",
-            markers=True,
-            labels={"Order Date": "Month", "Sales": "Total Sales"},
-            color_discrete_sequence=[colors['secondary']]
-        )
-        st.plotly_chart(fig1, use_container_width=True)
+        if tab1.open and ready("overview"):
+            st.markdown("### Sales Overview")
 
-        # Best month
-        best_month, month_sales = best_selling_month(df)
-        st.info(f"**Best Selling Month (All Years):** {best_month}")
-
-        # Monthly breakdown
-        st.markdown("#### Average Sales by Month")
-        fig2 = px.bar(
-            month_sales,
-            x=month_sales.index,
-            y=month_sales.values,
-            title="Total Sales by Month",
-            labels={"x": "Month", "y": "Sales"},
-            color_discrete_sequence=[colors['primary']]
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+            # Sales trend over time
+            granularity = st.radio(
+                "Granularity", list(FREQUENCIES), index=list(FREQUENCIES).index("Monthly"), horizontal=True
+            )
+            trend = sales_trend(df, FREQUENCIES[granularity])
+            fig1 = chart("sales_trend", lambda: px.line(
+                trend,
+                x="Order Date",
+                y="Sales",
+                title="Sales Over Time",
+                markers=True,
+                labels={"Order Date": "Period", "Sales": "Total Sales"},
+                color_discrete_sequence=[colors['secondary']]
+            ), granularity)
+            plot(fig1)
+
+            # Best month
+            best_month, month_sales = best_selling_month(df)
+            st.info(f"**Best Selling Month (All Years):** {best_month}")
+
+            # Monthly breakdown
+            st.markdown("#### Average Sales by Month")
+            fig2 = chart("month_sales", lambda: px.bar(
+                month_sales,
+                x=month_sales.index,
+                y=month_sales.values,
+                title="Total Sales by Month",
+                labels={"x": "Month", "y": "Sales"},
+                color_discrete_sequence=[colors['primary']]
+            ))
+            plot(fig2)
 
     # ----------------------------------------------------------------
     # TAB 2: Category Insights
     # ----------------------------------------------------------------
     with tab2:
-        st.markdown("### Category Performance")
-
-        # Category-wise monthly trend
-        category_month = category_performance_by_month(df)
-        fig3 = px.line(
-            category_month,
-            x="Month",
-            y="Sales",
-            color="Category",
-            markers=True,
-            title="Category-wise Sales by Month",
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
-        st.plotly_chart(fig3, use_container_width=True)
-
-        # Discount to sales ratio
-        st.markdown("### Discount vs Sales Ratio")
-        discount_ratio = discount_to_sales_ratio(df)
-        st.dataframe(discount_ratio.style.format("{:.2f}"))
-
-        fig4 = px.bar(
-            discount_ratio,
-            x=discount_ratio.index,
-            y="Sales-to-Discount",
-            title="Sales-to-Discount Ratio by Category",
-            labels={"x": "Category", "y": "Sales-to-Discount Ratio"},
-            color_discrete_sequence=[colors['accent']]
-        )
-        st.plotly_chart(fig4, use_container_width=True)
-        # --- Profit Margin by Category ---
-        st.markdown("### Profit Margin by Category")
-        margin_df = profit_margin_by_category(df)
-
-        fig5 = px.bar(
-            margin_df,
-            x="Category",
-            y="Profit_Margin",
-            title="Profit Margin (%) by Category",
-            labels={"Profit_Margin": "Profit Margin (%)"},
-            color_discrete_sequence=[colors['secondary']]
-        )
-        st.plotly_chart(fig5, use_container_width=True)
+        if tab2.open and ready("category"):
+            st.markdown("### Category Performance")
+
+            # Category-wise monthly trend
+            category_month = category_performance_by_month(df)
+            fig3 = chart("category_month", lambda: px.line(
+                category_month,
+                x="Month",
+                y="Sales",
+                color="Category",
+                markers=True,
+                title="Category-wise Sales by Month",
+                color_discrete_sequence=px.colors.qualitative.Set2
+            ))
+            plot(fig3)
+
+            # Discount to sales ratio
+            st.markdown("### Discount vs Sales Ratio")
+            discount_ratio = discount_to_sales_ratio(df)
+            st.dataframe(discount_ratio.style.format("{:.2f}"))
+
+            fig4 = chart("discount_ratio", lambda: px.bar(
+                discount_ratio,
+                x=discount_ratio.index,
+                y="Sales-to-Discount",
+                title="Sales-to-Discount Ratio by Category",
+                labels={"x": "Category", "y": "Sales-to-Discount Ratio"},
+                color_discrete_sequence=[colors['accent']]
+            ))
+            plot(fig4)
+            # --- Profit Margin by Category ---
+            st.markdown("### Profit Margin by Category")
+            margin_df = profit_margin_by_category(df)
+
+            fig5 = chart("category_margin", lambda: px.bar(
+                margin_df,
+                x="Category",
+                y="Profit_Margin",
+                title="Profit Margin (%) by Category",
+                labels={"Profit_Margin": "Profit Margin (%)"},
+                color_discrete_sequence=[colors['secondary']]
+            ))
+            plot(fig5)
 
     # ----------------------------------------------------------------
     # TAB 3: Regional Analysis
     # ----------------------------------------------------------------
     with tab3:
-        st.markdown("### 🗺️ Regional Analysis")
-
-        # --- KPI: Best Region ---
-        top_region = best_region(df)
-        st.success(f"🏆 **Top Performing Region:** {top_region}")
-
-        # --- Sales vs Profit by Region ---
-        region_df = regional_summary(df)
-        fig6 = px.bar(
-            region_df,
-            x="Region",
-            y=["Sales", "Profit"],
-            barmode="group",
-            title="Sales vs Profit by Region",
-            labels={"value": "Amount ($)", "Region": "Region", "variable": "Metric"},
-            color_discrete_sequence=[colors['primary'], colors['secondary']]
-        )
-        st.plotly_chart(fig6, use_container_width=True)
-
-        # --- Choropleth Map: Sales by State ---
-        st.markdown("### 🌍 Sales Distribution by State (USA)")
-        state_df = statewise_sales(df)
-
-        if not state_df.empty:
-            fig7 = px.choropleth(
-                state_df,
-                locations="State Code",       # use abbreviations now
-                locationmode="USA-states",
-                color="Sales",
-                scope="usa",
-                color_continuous_scale="YlGn",
-                title="Total Sales by State"
+        if tab3.open and ready("regional"):
+            st.markdown("### 🗺️ Regional Analysis")
+
+            # --- KPI: Best Region ---
+            top_region = best_region(df)
+            st.success(f"🏆 **Top Performing Region:** {top_region}")
+
+            # --- Sales vs Profit by Region ---
+            region_df = regional_summary(df)
+            fig6 = chart("region_sales", lambda: px.bar(
+                region_df,
+                x="Region",
+                y=["Sales", "Profit"],
+                barmode="group",
+                title="Sales vs Profit by Region",
+                labels={"value": "Amount ($)", "Region": "Region", "variable": "Metric"},
+                color_discrete_sequence=[colors['primary'], colors['secondary']]
+            ))
+            plot(fig6)
+
+            # --- Choropleth Map: Sales by State ---
+            st.markdown("### 🌍 Sales Distribution by State (USA)")
+            state_df = statewise_sales(df)
+
+            if not state_df.empty:
+                fig7 = chart("state_map", lambda: px.choropleth(
+                    state_df,
+                    locations="State Code",       # use abbreviations now
+                    locationmode="USA-states",
+                    color="Sales",
+                    scope="usa",
+                    color_continuous_scale="YlGn",
+                    title="Total Sales by State"
+                ))
+                plot(fig7)
+            else:
+                st.warning("⚠️ State-level data unavailable or not recognized.")
+
+            # --- Multi-country datasets: Sales by Country ---
+            country_df = country_sales(df)
+            if len(country_df) > 1:
+                fig7b = chart("country_map", lambda: px.choropleth(
+                    country_df,
+                    locations="Country Code",
+                    locationmode="ISO-3",
+                    color="Sales",
+                    hover_name="Country",
+                    color_continuous_scale="YlGn",
+                    title="Total Sales by Country"
+                ))
+                plot(fig7b)
+
+            # --- Top Cities (rolled up once per dataset, however many cities) ---
+            if "City" in df.columns:
+                city_df = city_sales(df)
+                fig7c = chart("top_cities", lambda: px.bar(
+                    city_df,
+                    x="Sales",
+                    y="City",
+                    orientation="h",
+                    hover_data=["State Code", "Profit"],
+                    title="Top 15 Cities by Sales",
+                    color_discrete_sequence=[colors['primary']]
+                ).update_layout(yaxis={"categoryorder": "total ascending"}))
+                plot(fig7c)
+
+            unmatched_df = unmatched_geo(df)
+            if not unmatched_df.empty:
+                with st.expander(f"⚠️ {len(unmatched_df)} location value(s) could not be matched"):
+                    st.dataframe(unmatched_df.style.format({"Sales": "{:,.0f}"}), hide_index=True)
+
+            # --- Regional Profit Margin ---
+            st.markdown("### 💰 Regional Profit Margin (%)")
+            region_margin = region_df.assign(
+                **{"Profit Margin (%)": (region_df["Profit"] / region_df["Sales"]) * 100}
             )
-            st.plotly_chart(fig7, use_container_width=True)
-        else:
-            st.warning("⚠️ State-level data unavailable or not recognized.")
-
-        # --- Regional Profit Margin ---
-        st.markdown("### 💰 Regional Profit Margin (%)")
-        region_df["Profit Margin (%)"] = (region_df["Profit"] / region_df["Sales"]) * 100
-        fig8 = px.bar(
-            region_df,
-            x="Region",
-            y="Profit Margin (%)",
-            title="Profit Margin by Region",
-            color_discrete_sequence=[colors['secondary']]
-        )
-        st.plotly_chart(fig8, use_container_width=True)
+            fig8 = chart("region_margin", lambda: px.bar(
+                region_margin,
+                x="Region",
+                y="Profit Margin (%)",
+                title="Profit Margin by Region",
+                color_discrete_sequence=[colors['secondary']]
+            ))
+            plot(fig8)
 
     # ----------------------------------------------------------------
     # TAB 4: Product Performance
     # ----------------------------------------------------------------
     with tab4:
-        st.markdown("### 📈 Product Performance Analysis")
-
-        # --- Top 10 Products by Sales ---
-        st.markdown("#### 🏆 Top 10 Products by Sales")
-        top_df = top_products(df)
-        fig9 = px.bar(
-            top_df,
-            x="Sales",
-            y="Product Name",
-            orientation="h",
-            title="Top 10 Products by Sales",
-            color_discrete_sequence=[colors['primary']]
-        )
-        st.plotly_chart(fig9, use_container_width=True)
-        st.dataframe(top_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}"}))
-
-        st.markdown("---")
-
-        # --- Bottom 10 Products by Profit ---
-        st.markdown("#### ⚠️ Bottom 10 Products by Profit")
-        bottom_df = bottom_products(df)
-        fig10 = px.bar(
-            bottom_df,
-            x="Profit",
-            y="Product Name",
-            orientation="h",
-            title="Bottom 10 Products by Profit",
-            color_discrete_sequence=[colors['secondary']]
-        )
-        st.plotly_chart(fig10, use_container_width=True)
-        st.dataframe(bottom_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}"}))
+        if tab4.open and ready("product"):
+            st.markdown("### 📈 Product Performance Analysis")
+
+            # --- Top 10 Products by Sales ---
+            st.markdown("#### 🏆 Top 10 Products by Sales")
+            top_df = top_products(df)
+            fig9 = chart("top_products", lambda: px.bar(
+                top_df,
+                x="Sales",
+                y="Product Name",
+                orientation="h",
+                title="Top 10 Products by Sales",
+                color_discrete_sequence=[colors['primary']]
+            ))
+            plot(fig9)
+            st.dataframe(top_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}"}))
+
+            st.markdown("---")
+
+            # --- Bottom 10 Products by Profit ---
+            st.markdown("#### ⚠️ Bottom 10 Products by Profit")
+            bottom_df = bottom_products(df)
+            fig10 = chart("bottom_products", lambda: px.bar(
+                bottom_df,
+                x="Profit",
+                y="Product Name",
+                orientation="h",
+                title="Bottom 10 Products by Profit",
+                color_discrete_sequence=[colors['secondary']]
+            ))
+            plot(fig10)
+            st.dataframe(bottom_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}"}))
 
     # ----------------------------------------------------------------
     # TAB 5: Segment Analysis
     # ----------------------------------------------------------------
     with tab5:
-        st.markdown("### 👥 Segment Analysis")
-
-        seg_df = segment_summary(df)
-        top_seg = best_segment(df)
-        st.success(f"🏆 **Top Performing Segment:** {top_seg}")
-
-        # --- Sales & Profit by Segment ---
-        st.markdown("#### 💰 Sales & Profit by Segment")
-        fig11 = px.bar(
-            seg_df,
-            x="Segment",
-            y=["Total_Sales", "Profit"],
-            barmode="group",
-            title="Sales vs Profit by Segment",
-            labels={"value": "Amount ($)", "Segment": "Segment", "variable": "Metric"},
-            color_discrete_sequence=[colors["primary"], colors["secondary"]],
-        )
-        st.plotly_chart(fig11, use_container_width=True)
-
-        # --- Profit Margin by Segment ---
-        st.markdown("#### 📈 Profit Margin by Segment (%)")
-        fig12 = px.bar(
-            seg_df,
-            x="Segment",
-            y="Profit_Margin(%)",
-            title="Profit Margin (%) by Segment",
-            color_discrete_sequence=[colors["secondary"]],
-        )
-        st.plotly_chart(fig12, use_container_width=True)
-
-        # --- Average Discount by Segment ---
-        st.markdown("#### 💸 Average Discount by Segment")
-        fig13 = px.bar(
-            seg_df,
-            x="Segment",
-            y="Discount",
-            title="Average Discount by Segment",
-            color_discrete_sequence=[colors["accent"]],
-        )
-        st.plotly_chart(fig13, use_container_width=True)
-
-        # --- Data Table ---
-        st.dataframe(
-            seg_df.style.format(
-                {
-                    "Total_Sales": "{:,.0f}",
-                    "Profit": "{:,.0f}",
-                    "Discount": "{:.2%}",
-                    "Profit_Margin(%)": "{:.2f}",
-                }
+        if tab5.open and ready("segment"):
+            st.markdown("### 👥 Segment Analysis")
+
+            seg_df = segment_summary(df)
+            top_seg = best_segment(df)
+            st.success(f"🏆 **Top Performing Segment:** {top_seg}")
+
+            # --- Sales & Profit by Segment ---
+            st.markdown("#### 💰 Sales & Profit by Segment")
+            fig11 = chart("segment_sales", lambda: px.bar(
+                seg_df,
+                x="Segment",
+                y=["Total_Sales", "Profit"],
+                barmode="group",
+                title="Sales vs Profit by Segment",
+                labels={"value": "Amount ($)", "Segment": "Segment", "variable": "Metric"},
+                color_discrete_sequence=[colors["primary"], colors["secondary"]],
+            ))
+            plot(fig11)
+
+            # --- Profit Margin by Segment ---
+            st.markdown("#### 📈 Profit Margin by Segment (%)")
+            fig12 = chart("segment_margin", lambda: px.bar(
+                seg_df,
+                x="Segment",
+                y="Profit_Margin(%)",
+                title="Profit Margin (%) by Segment",
+                color_discrete_sequence=[colors["secondary"]],
+            ))
+            plot(fig12)
+
+            # --- Average Discount by Segment ---
+            st.markdown("#### 💸 Average Discount by Segment")
+            fig13 = chart("segment_discount", lambda: px.bar(
+                seg_df,
+                x="Segment",
+                y="Discount",
+                title="Average Discount by Segment",
+                color_discrete_sequence=[colors["accent"]],
+            ))
+            plot(fig13)
+
+            # --- Data Table ---
+            st.dataframe(
+                seg_df.style.format(
+                    {
+                        "Total_Sales": "{:,.0f}",
+                        "Profit": "{:,.0f}",
+                        "Discount": "{:.2%}",
+                        "Profit_Margin(%)": "{:.2f}",
+                    }
+                )
             )
-        )
+
+            # --- Distinct Customers & Products ---
+            st.markdown("#### 🧾 Distinct Orders, Customers & Products")
+            group_by = st.selectbox(
+                "Count per", [g for g in DISTINCT_GROUPS if g == PERIOD_GROUP or g in df.columns]
+            )
+            distinct_df = distinct_summary(df, group_by, distinct_mode)
+            # Cached result: convert labels on a copy.
+            distinct_df = distinct_df.astype({group_by: str})
+            fig_distinct = chart("distinct_counts", lambda: px.bar(
+                distinct_df,
+                x=group_by,
+                y=[col for col in ["Customers", "Products"] if col in distinct_df.columns],
+                barmode="group",
+                title=f"Distinct Customers & Products by {group_by}",
+                color_discrete_sequence=[colors["primary"], colors["secondary"]],
+            ), group_by, distinct_mode)
+            plot(fig_distinct)
+            st.dataframe(distinct_df, hide_index=True)
 
 
     # ----------------------------------------------------------------
     # TAB 6: Correlation Matrix
     # ----------------------------------------------------------------
     with tab6:
-        st.markdown("### 📊 Correlation Analysis")
-
-        corr_df = correlation_matrix(df)
-        st.dataframe(corr_df.style.background_gradient(cmap="YlGn", axis=None))
-
-        # --- Plotly Heatmap ---
-        import plotly.figure_factory as ff
-
-        z = corr_df.values
-        x = corr_df.columns.tolist()
-        y = corr_df.columns.tolist()
-
-        fig14 = ff.create_annotated_heatmap(
-            z=z,
-            x=x,
-            y=y,
-            colorscale="YlGn",
-            showscale=True,
-            zmin=-1,
-            zmax=1
-        )
-        fig14.update_layout(
-            title="Correlation Matrix (Sales, Profit, Discount, Quantity)",
-            title_x=0.5,
-            font=dict(size=12, color=colors["text"]),
-            plot_bgcolor=colors["background"],
-            paper_bgcolor=colors["background"]
-        )
-        st.plotly_chart(fig14, use_container_width=True)
-
-        # --- Insight hint ---
-        st.info("🧠 **Tip:** A negative correlation between Profit and Discount suggests that higher discounts reduce profit margins.")
+        if tab6.open and ready("correlation"):
+            st.markdown("### 📊 Correlation Analysis")
+
+            scopes = {"Overall": None, **{g: g for g in CORRELATION_GROUPS if g in df.columns}}
+            corr_methods = {"Pearson": "pearson", "Spearman (rank)": "spearman"}
+            col_scope, col_group, col_method = st.columns(3)
+            scope = scopes[col_scope.selectbox("Scope", list(scopes))]
+            corr_method = corr_methods[col_method.radio("Method", list(corr_methods), horizontal=True)]
+            # Matrices come from cached per-group moments (and ranks), so
+            # switching scope or method doesn't rescan the rows.
+            corr_df = correlation_matrix(df, scope, corr_method)
+            group = None
+            if scope is not None:
+                group = col_group.selectbox(scope, corr_df.index.get_level_values(0).unique())
+                corr_df = corr_df.loc[group]
+            st.dataframe(corr_df.style.background_gradient(cmap="YlGn", axis=None))
+
+            # --- Plotly Heatmap ---
+            import plotly.figure_factory as ff
+
+            z = corr_df.values
+            x = corr_df.columns.tolist()
+            y = corr_df.columns.tolist()
+
+            fig14 = chart("correlation", lambda: ff.create_annotated_heatmap(
+                z=z,
+                x=x,
+                y=y,
+                colorscale="YlGn",
+                showscale=True,
+                zmin=-1,
+                zmax=1
+            ).update_layout(
+                title="Correlation Matrix (Sales, Profit, Discount, Quantity)",
+                title_x=0.5,
+                font=dict(size=12, color=colors["text"]),
+                plot_bgcolor=colors["background"],
+                paper_bgcolor=colors["background"]
+            ), scope, corr_method, group)
+            plot(fig14)
+
+            # --- Insight hint ---
+            st.info("🧠 **Tip:** A negative correlation between Profit and Discount suggests that higher discounts reduce profit margins.")
 
 
 
@@ -391,65 +534,265 @@ if df is not None:
     # TAB 7: Outlier Detection
     # ----------------------------------------------------------------
     with tab7:
-        st.markdown("### 🚨 Outlier & Loss Analysis")
-
-        st.markdown("#### ⚠️ Products with Abnormal Profit or Discount Patterns")
-        outlier_df = detect_outliers(df)
-
-        if not outlier_df.empty:
-            st.dataframe(
-                outlier_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}", "Discount": "{:.2%}"})
-                .background_gradient(cmap="YlOrBr", subset=["Discount"])
+        if tab7.open and ready("outlier"):
+            st.markdown("### 🚨 Outlier & Loss Analysis")
+
+            st.markdown("#### ⚠️ Products with Abnormal Profit or Discount Patterns")
+            contexts = {**{group: group for group in OUTLIER_GROUPS}, "Whole dataset": None}
+            methods = {"Z-score": "zscore", "Robust (MAD)": "mad", "Robust (IQR)": "iqr"}
+            col_ctx, col_method, col_thresh = st.columns(3)
+            context = col_ctx.selectbox(
+                "Compare each row within", [c for c in contexts if contexts[c] is None or contexts[c] in df.columns]
             )
+            method = col_method.selectbox("Scoring", list(methods))
+            # Scores are cached per dataset version, so moving the threshold is cheap.
+            z_thresh = col_thresh.slider("Threshold (std. deviations)", 1.5, 5.0, 2.5, 0.1)
+            outlier_df = detect_outliers(df, z_thresh, by=contexts[context], method=methods[method])
+
+            if not outlier_df.empty:
+                st.dataframe(
+                    outlier_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}", "Discount": "{:.2%}"})
+                    .background_gradient(cmap="YlOrBr", subset=["Discount"])
+                )
+
+                import plotly.express as px
+                fig15 = chart("outliers", lambda: px.scatter(
+                    outlier_df,
+                    x="Discount",
+                    y="Profit",
+                    color="Sales",
+                    hover_name="Product Name",
+                    title="Outlier Products: Profit vs Discount",
+                    color_continuous_scale="YlGn",
+                ), context, method, z_thresh)
+                plot(fig15)
+            else:
+                st.success("✅ No significant outliers detected in the dataset.")
+
+            st.markdown("---")
+            st.markdown("#### 💸 Persistent Loss-Making Products")
+            loss_df = loss_drivers(df)
+            if not loss_df.empty:
+                st.dataframe(loss_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}", "Discount": "{:.2%}"}))
+                fig16 = chart("loss_drivers", lambda: px.bar(
+                    loss_df.head(10),
+                    x="Profit",
+                    y="Product Name",
+                    orientation="h",
+                    title="Top 10 Products with Negative Profit",
+                    color_discrete_sequence=[colors["secondary"]],
+                ))
+                plot(fig16)
+            else:
+                st.info("🎉 No consistently loss-making products found!")
 
-            import plotly.express as px
-            fig15 = px.scatter(
-                outlier_df,
-                x="Discount",
-                y="Profit",
-                color="Sales",
-                hover_name="Product Name",
-                title="Outlier Products: Profit vs Discount",
-                color_continuous_scale="YlGn",
+    # ----------------------------------------------------------------
+    # TAB 8: Logistics
+    # ----------------------------------------------------------------
+    with tab8:
+        if tab8.open and ready("logistics"):
+            st.markdown("### 🚚 Shipping Logistics")
+
+            overall = shipping_summary(df, None).iloc[0]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Median Lead Time", f"{overall['P50']:.0f} days")
+            col2.metric("90th Percentile", f"{overall['P90']:.0f} days")
+            col3.metric("Late Shipments", f"{late_shipment_rate(df):.1%}")
+
+            groups = [col for col in LOGISTICS_GROUPS if col in df.columns]
+            if groups:
+                by = st.selectbox("Break down by", groups)
+                ship_df = shipping_summary(df, by)
+                st.dataframe(
+                    ship_df.style.format({
+                        "Shipments": "{:,.0f}", "Mean Days": "{:.2f}", "P50": "{:.0f}",
+                        "P90": "{:.0f}", "P95": "{:.0f}", "Late Rate": "{:.1%}",
+                    })
+                    .background_gradient(cmap="YlOrBr", subset=["Late Rate"])
+                )
+
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    fig17 = chart("lead_times", lambda: px.bar(
+                        lead_time_distribution(df, by),
+                        x="Lead Days",
+                        y="Shipments",
+                        color=by,
+                        barmode="group",
+                        title=f"Lead-Time Distribution by {by}",
+                        color_discrete_sequence=px.colors.qualitative.Set2,
+                    ), by)
+                    plot(fig17)
+                with col_b:
+                    fig18 = chart("late_rate", lambda: px.bar(
+                        ship_df,
+                        x=by,
+                        y="Late Rate",
+                        title=f"Late-Shipment Rate by {by}",
+                        color="Late Rate",
+                        color_continuous_scale="YlOrBr",
+                    ).update_layout(yaxis_tickformat=".0%"), by)
+                    plot(fig18)
+            else:
+                fig17 = chart("lead_times", lambda: px.bar(
+                    lead_time_distribution(df),
+                    x="Lead Days",
+                    y="Shipments",
+                    title="Lead-Time Distribution",
+                    color_discrete_sequence=[colors["secondary"]],
+                ))
+                plot(fig17)
+
+            st.caption(
+                "Lead time is days from order to shipment; a shipment is late when it "
+                "leaves after its ship mode's target (" + ", ".join(
+                    f"{mode} {days}d" for mode, days in SHIP_TARGET_DAYS.items()
+                ) + ")."
             )
-            st.plotly_chart(fig15, use_container_width=True)
-        else:
-            st.success("✅ No significant outliers detected in the dataset.")
-
-        st.markdown("---")
-        st.markdown("#### 💸 Persistent Loss-Making Products")
-        loss_df = loss_drivers(df)
-        if not loss_df.empty:
-            st.dataframe(loss_df.style.format({"Sales": "{:,.0f}", "Profit": "{:,.0f}", "Discount": "{:.2%}"}))
-            fig16 = px.bar(
-                loss_df.head(10),
-                x="Profit",
-                y="Product Name",
-                orientation="h",
-                title="Top 10 Products with Negative Profit",
-                color_discrete_sequence=[colors["secondary"]],
+
+    # ----------------------------------------------------------------
+    # TAB 9: Forecast
+    # ----------------------------------------------------------------
+    with tab9:
+        if tab9.open:
+            st.markdown("### 🔮 Sales Forecast")
+
+            groups = {"Overall": None, **{g: g for g in FORECAST_GROUPS if g in df.columns}}
+            col_by, col_horizon = st.columns(2)
+            forecast_by = groups[col_by.selectbox("Forecast per", list(groups))]
+            horizon = col_horizon.slider("Months ahead", 1, 24, DEFAULT_HORIZON)
+
+            def forecast_chart():
+                forecast_df, pending = sales_forecast(df, forecast_by, horizon)
+                if not forecast_df.empty:
+                    fig19 = chart("forecast", lambda: px.line(
+                        forecast_df,
+                        x="Order Date",
+                        y="Sales",
+                        color=forecast_by,
+                        line_dash="Kind",
+                        title="Monthly Sales and Forecast",
+                        labels={"Order Date": "Month", "Sales": "Total Sales"},
+                        color_discrete_sequence=px.colors.qualitative.Set2 if forecast_by else [colors["secondary"]],
+                    ), forecast_by, horizon, pending)
+                    plot(fig19)
+                if pending:
+                    st.info(f"⏳ Fitting {pending} forecast model(s) in the background…")
+                elif in_progress:
+                    # Done: rerun the page once to stop polling.
+                    st.rerun()
+
+            # Models fit in a worker pool; while any are pending, only this
+            # chart reruns (every FORECAST_POLL_SECONDS) to pick them up.
+            in_progress = sales_forecast(df, forecast_by, horizon)[1] > 0
+            if in_progress:
+                st.fragment(forecast_chart, run_every=FORECAST_POLL_SECONDS)()
+            else:
+                forecast_chart()
+
+            st.caption(
+                "Holt-Winters exponential smoothing per group on monthly sales; "
+                "models are cached per dataset version and refit from their previous "
+                "parameters when appended data extends the series."
             )
-            st.plotly_chart(fig16, use_container_width=True)
-        else:
-            st.info("🎉 No consistently loss-making products found!")
 
     # ----------------------------------------------------------------
-    # TAB 8: Recommendations
+    # TAB 10: Recommendations
     # ----------------------------------------------------------------
-    with tab8:
-        st.markdown("### 💡 Data-Driven Recommendations")
+    with tab10:
+        if tab10.open and ready():
+            st.markdown("### 💡 Data-Driven Recommendations")
+
+            _, month_sales = best_selling_month(df)
+            discount_ratio = discount_to_sales_ratio(df)
+            recs = memoized(
+                df, ("recommendations",),
+                lambda: generate_recommendations(df, month_sales, discount_ratio),
+            )
+            for r in recs:
+                st.markdown(f"- {r}")
+
+            st.markdown("---")
+            st.caption("📈 These recommendations are generated using pattern analysis on sales, discounts, and seasonal performance.")
+
+elif df is not None:
+    st.warning("⚠️ No rows match the selected filters.")
+
+elif st.session_state.get("stream_summary") is not None:
+    # ============================================================
+    # 🌊 STREAMED SUMMARY (large uploads, aggregates only)
+    # ============================================================
+    summary = st.session_state["stream_summary"]["summary"]
+    kpis = summary["kpis"]
+    profit_margin = kpis["total_profit"] / kpis["total_sales"] * 100 if kpis["total_sales"] > 0 else 0
+    st.info(f"🌊 Streaming mode: showing summary views for {summary['rows']:,} rows.")
+    st.subheader("Key Performance Indicators")
 
-        recs = generate_recommendations(df, month_sales, discount_ratio)
-        for r in recs:
-            st.markdown(f"- {r}")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Total Sales", f"${kpis['total_sales']:,.0f}")
+    col2.metric("Total Profit", f"${kpis['total_profit']:,.0f}")
+    col3.metric("Profit Margin", f"{profit_margin:.2f}%")
+    col4.metric("Avg Discount", f"{kpis['avg_discount']:.2%}")
+    col5.metric("Total Orders", kpis['total_orders'])
 
-        st.markdown("---")
-        st.caption("📈 These recommendations are generated using pattern analysis on sales, discounts, and seasonal performance.")
+    fig1 = px.line(
+        summary["trend"],
+        x="Order Date",
+        y="Sales",
+        title="Sales Over Time",
+        markers=True,
+        labels={"Order Date": "Month", "Sales": "Total Sales"},
+        color_discrete_sequence=[colors['secondary']]
+    )
+    plot(fig1)
+
+    col_left, col_right = st.columns(2)
+    if "category" in summary:
+        fig2 = px.bar(
+            summary["category"],
+            x="Category",
+            y=["Sales", "Profit"],
+            barmode="group",
+            title="Sales vs Profit by Category",
+            color_discrete_sequence=[colors['primary'], colors['secondary']]
+        )
+        plot(fig2, col_left)
+    if "region" in summary:
+        fig3 = px.bar(
+            summary["region"],
+            x="Region",
+            y=["Sales", "Profit"],
+            barmode="group",
+            title="Sales vs Profit by Region",
+            color_discrete_sequence=[colors['primary'], colors['secondary']]
+        )
+        plot(fig3, col_right)
+    if "product" in summary:
+        fig4 = px.bar(
+            summary["product"].head(10),
+            x="Sales",
+            y="Product Name",
+            orientation="h",
+            title="Top 10 Products by Sales",
+            color_discrete_sequence=[colors['primary']]
+        )
+        plot(fig4)
+        if summary.get("product_error"):
+            st.caption(
+                f"Approximate ranking: only the heaviest products were tracked, so totals "
+                f"may be low by up to ${summary['product_error']:,.0f}."
+            )
+
+elif job is not None and job["status"] == "running":
+    st.info("⏳ Loading your dataset in the background; the dashboard appears once it is parsed.")
 
 else:
     st.warning("⚠️ Please load a dataset to start analysis.")
 
 
+performance_panel()
+
+
 # ============================================================
 # 🎯 Floating CTA Button (Bottom-Right)
 # ============================================================
@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+
+# ============================================================
+# 📊 Compare Benchmark Runs
+# ============================================================
+
+# Metric -> smallest absolute change worth reporting (timer / allocator noise).
+METRICS = {"cold_median_s": 0.001, "warm_median_s": 0.001, "peak_mb": 1.0}
+
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+    return {(r["name"], r["rows"]): r for r in report["results"]}, report["meta"]
+
+
+def compare(base, head, threshold=0.10):
+    """Rows of (name, rows, metric, base, head, ratio, regressed) for shared results."""
+    rows = []
+    for key in sorted(base.keys() & head.keys(), key=lambda k: (k[1], k[0])):
+        for metric, noise in METRICS.items():
+            old, new = base[key].get(metric), head[key].get(metric)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old else float("inf")
+            regressed = ratio > 1 + threshold and new - old > noise
+            rows.append((*key, metric, old, new, ratio, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown or memory growth reported as a regression.")
+    args = parser.parse_args()
+
+    base, base_meta = load_results(args.base)
+    head, head_meta = load_results(args.head)
+    print(f"base {base_meta.get('commit')}  ->  head {head_meta.get('commit')}")
+
+    rows = compare(base, head, args.threshold)
+    for name, n_rows, metric, old, new, ratio, regressed in rows:
+        flag = "  ⚠️ regression" if regressed else ""
+        print(f"{n_rows:>10,}  {name:<30} {metric:<14} {old:10.4f} -> {new:10.4f}  x{ratio:5.2f}{flag}")
+
+    regressions = sum(row[-1] for row in rows)
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
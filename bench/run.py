@@ -0,0 +1,218 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import utils.calculate as calc
+from bench.synth import load_reference, synthesize
+from utils.aggregate import clear_aggregates, stamp_version
+from utils.chart import reduce_figure
+from utils.forecast import clear_fits, submit_forecasts
+from utils.load import compact_dtypes
+from utils.recommend import generate_recommendations
+from utils.timeseries import FREQUENCIES
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+
+
+def _recommendations(df):
+    _, month_sales = calc.best_selling_month(df)
+    return generate_recommendations(df, month_sales, calc.discount_to_sales_ratio(df))
+
+
+def _forecast(df):
+    # sales_forecast only submits the fits; wait for them, as the page polls.
+    for _, future in submit_forecasts(df, "Region").values():
+        future.result()
+    return calc.sales_forecast(df, "Region")
+
+
+# Every analytics entry point, in the order app.py uses them.
+FUNCTIONS = {
+    "get_basic_kpis": calc.get_basic_kpis,
+    "get_basic_kpis_hll": lambda df: calc.get_basic_kpis(df, "hll"),
+    "get_profit_margin": calc.get_profit_margin,
+    "sales_trend": calc.sales_trend,
+    "sales_trend_daily": lambda df: calc.sales_trend(df, FREQUENCIES["Daily"]),
+    "best_selling_month": calc.best_selling_month,
+    "category_performance_by_month": calc.category_performance_by_month,
+    "discount_to_sales_ratio": calc.discount_to_sales_ratio,
+    "profit_margin_by_category": calc.profit_margin_by_category,
+    "best_region": calc.best_region,
+    "regional_summary": calc.regional_summary,
+    "statewise_sales": calc.statewise_sales,
+    "country_sales": calc.country_sales,
+    "city_sales": calc.city_sales,
+    "unmatched_geo": calc.unmatched_geo,
+    "top_products": calc.top_products,
+    "bottom_products": calc.bottom_products,
+    "segment_summary": calc.segment_summary,
+    "best_segment": calc.best_segment,
+    "distinct_summary": lambda df: calc.distinct_summary(df, "Region"),
+    "distinct_summary_hll": lambda df: calc.distinct_summary(df, "Region", "hll"),
+    "correlation_matrix": calc.correlation_matrix,
+    "detect_outliers": calc.detect_outliers,
+    "loss_drivers": calc.loss_drivers,
+    "shipping_summary": lambda df: calc.shipping_summary(df, None),
+    "late_shipment_rate": calc.late_shipment_rate,
+    "shipping_summary_by_mode": calc.shipping_summary,
+    "lead_time_distribution": lambda df: calc.lead_time_distribution(df, "Ship Mode"),
+    "sales_forecast": _forecast,
+    "generate_recommendations": _recommendations,
+}
+
+
+# ============================================================
+# ⏱️ Measurement
+# ============================================================
+
+def _timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), float(np.median(times))
+
+
+def _peak_bytes(func):
+    # Separate traced run: tracemalloc slows allocation-heavy code down.
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(name, cold, warm=None, repeat=3):
+    """Cold timings (caches cleared), optional warm timings and peak memory."""
+    def run_cold():
+        # Stored forecast fits outlive the aggregates; cold runs refit too.
+        clear_aggregates()
+        clear_fits()
+        cold()
+
+    best, median = _timed(run_cold, repeat)
+    result = {"name": name, "cold_min_s": best, "cold_median_s": median}
+    if warm is not None:
+        run_cold()
+        result["warm_min_s"], result["warm_median_s"] = _timed(warm, repeat)
+    result["peak_mb"] = _peak_bytes(run_cold) / 1024 ** 2
+    return result
+
+
+def page_figures(results):
+    """Build the page's Plotly figures from render results, reduced and serialized as app.py sends them."""
+    import plotly.express as px
+
+    month_sales = results["best_selling_month"][1]
+    distinct = results["distinct_summary"].astype({"Region": str})
+    charts = [
+        px.line(results["sales_trend"], x="Order Date", y="Sales", markers=True),
+        px.line(results["sales_trend_daily"], x="Order Date", y="Sales", markers=True),
+        px.bar(month_sales, x=month_sales.index, y=month_sales.values),
+        px.line(results["category_performance_by_month"], x="Month", y="Sales", color="Category"),
+        px.bar(results["regional_summary"], x="Region", y=["Sales", "Profit"], barmode="group"),
+        px.choropleth(results["statewise_sales"], locations="State Code",
+                      locationmode="USA-states", color="Sales", scope="usa"),
+        px.choropleth(results["country_sales"], locations="Country Code",
+                      locationmode="ISO-3", color="Sales"),
+        px.bar(results["city_sales"], x="Sales", y="City", orientation="h"),
+        px.bar(results["top_products"], x="Sales", y="Product Name", orientation="h"),
+        px.bar(distinct, x="Region", y=["Orders", "Customers", "Products"], barmode="group"),
+        px.scatter(results["detect_outliers"], x="Discount", y="Profit", color="Sales"),
+        px.bar(results["lead_time_distribution"], x="Lead Days", y="Shipments",
+               color="Ship Mode", barmode="group"),
+        px.line(results["sales_forecast"][0], x="Order Date", y="Sales",
+                color="Region", line_dash="Kind"),
+    ]
+    # Serialization is what Streamlit sends to the browser.
+    for fig in charts:
+        reduce_figure(fig).to_json()
+
+
+def render_page(df, figures=True):
+    """Everything one full page render computes, optionally with Plotly figures."""
+    results = {name: func(df) for name, func in FUNCTIONS.items()}
+    if figures:
+        page_figures(results)
+    return results
+
+
+def run_size(n_rows, reference, repeat=3, seed=0, figures=True):
+    """Benchmark every function plus a full page render on n_rows synthetic rows."""
+    raw = synthesize(n_rows, seed=seed, reference=reference)
+    df = stamp_version(raw.copy(), f"bench-{n_rows}-{seed}")
+    results = [measure("compact_dtypes", lambda: compact_dtypes(raw), repeat=repeat)]
+
+    for name, func in FUNCTIONS.items():
+        results.append(measure(name, lambda f=func: f(df), lambda f=func: f(df), repeat=repeat))
+    if figures:
+        rendered = render_page(df, figures=False)
+        results.append(measure("page_figures", lambda: page_figures(rendered), repeat=repeat))
+    results.append(measure(
+        "page_render",
+        lambda: render_page(df, figures),
+        lambda: render_page(df, figures),
+        repeat=repeat,
+    ))
+
+    for result in results:
+        result["rows"] = n_rows
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard analytics functions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-figures", action="store_true", help="Skip Plotly figures in the page render.")
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args()
+
+    reference = load_reference()
+    results = []
+    for n_rows in args.sizes:
+        for result in run_size(n_rows, reference, args.repeat, args.seed, not args.no_figures):
+            results.append(result)
+            print(f"{n_rows:>10,}  {result['name']:<30} {result['cold_median_s'] * 1000:10.2f} ms"
+                  f"  {result['peak_mb']:8.1f} MB")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from utils.dialect import read_csv_bytes
+from utils.load import SAMPLE_ENCODING, SAMPLE_PATH, preprocess
+
+# ============================================================
+# 🧪 Synthetic Orders
+# ============================================================
+
+# Rows in data/sample.csv; cardinalities are scaled relative to it.
+SAMPLE_ROWS = 9994
+
+# Upper bounds so huge runs keep catalog-like cardinalities.
+MAX_PRODUCTS = 250_000
+MAX_CUSTOMERS = 500_000
+
+
+def _scaled(base, n_rows, cap):
+    # Catalogs and customer bases grow sub-linearly with order volume.
+    return int(min(cap, max(base, base * (n_rows / SAMPLE_ROWS) ** 0.5)))
+
+
+def load_reference(path=SAMPLE_PATH):
+    """The sample dataset the synthetic schema and distributions come from."""
+    with open(path, "rb") as f:
+        df, dialect = read_csv_bytes(f.read(), SAMPLE_ENCODING)
+    return preprocess(df, date_format=dialect["date_format"])
+
+
+def synthesize(n_rows, seed=0, reference=None):
+    """
+    Orders with the sample's schema and realistic cardinalities: geography,
+    segments and ship modes keep the sample's mix, while products, customers
+    and orders scale with n_rows. The frame is returned through
+    preprocess(), so it carries the derived columns an upload would.
+    """
+    rng = np.random.default_rng(seed)
+    ref = load_reference() if reference is None else reference
+
+    # --- Products: sample catalog plus synthetic SKUs per sub-category ---
+    products = ref[["Product ID", "Product Name", "Category", "Sub-Category"]].drop_duplicates("Product ID")
+    n_products = _scaled(len(products), n_rows, MAX_PRODUCTS)
+    if n_products > len(products):
+        extra = products.sample(n_products - len(products), replace=True, random_state=seed).reset_index(drop=True)
+        suffix = pd.Series(np.arange(len(extra)), dtype=str)
+        extra["Product ID"] = extra["Product ID"].str[:7] + "SYN-" + suffix
+        extra["Product Name"] = extra["Product Name"] + " #" + suffix
+        products = pd.concat([products, extra], ignore_index=True)
+    # Zipf-like popularity so a few products dominate, as in real catalogs.
+    weights = 1.0 / np.arange(1, len(products) + 1) ** 0.8
+    product_idx = rng.choice(len(products), size=n_rows, p=weights / weights.sum())
+
+    # --- Customers and geography: sampled with the sample's frequencies ---
+    customers = ref[["Customer ID", "Customer Name", "Segment"]].drop_duplicates("Customer ID")
+    n_customers = _scaled(len(customers), n_rows, MAX_CUSTOMERS)
+    customer_idx = rng.integers(0, n_customers, size=n_rows)
+    base_customer = customer_idx % len(customers)
+    places = ref[["Country", "City", "State", "Postal Code", "Region"]]
+    place_idx = rng.integers(0, len(places), size=n_rows)
+
+    # --- Orders: about two lines per order, dated 2014-2017 ---
+    n_orders = max(1, n_rows // 2)
+    order_no = rng.integers(0, n_orders, size=n_rows)
+    order_day = rng.integers(0, 4 * 365, size=n_orders)[order_no]
+    order_date = np.datetime64("2014-01-01") + order_day.astype("timedelta64[D]")
+    ship_date = order_date + rng.integers(0, 8, size=n_rows).astype("timedelta64[D]")
+    order_year = order_date.astype("datetime64[Y]").astype(int) + 1970
+
+    # --- Measures: per-category price levels, discount-driven margins ---
+    category = products["Category"].to_numpy()[product_idx]
+    price_level = pd.Series(category).map(ref.groupby("Category")["Sales"].median()).to_numpy()
+    sales = np.round(price_level * rng.lognormal(0.0, 1.0, size=n_rows), 2)
+    discount = rng.choice(ref["Discount"].to_numpy(), size=n_rows)
+    margin = 0.25 - 1.2 * discount + rng.normal(0.0, 0.1, size=n_rows)
+    profit = np.round(sales * margin, 4)
+
+    def pick(frame, col, idx):
+        return frame[col].to_numpy()[idx]
+
+    order_id = "CA-" + pd.Series(order_year).astype(str) + "-" + pd.Series(order_no + 100000).astype(str)
+    customer_id = (
+        pd.Series(pick(customers, "Customer ID", base_customer))
+        + "-" + pd.Series(customer_idx // len(customers)).astype(str)
+    )
+    df = pd.DataFrame({
+        "Row ID": np.arange(1, n_rows + 1),
+        "Order ID": order_id.to_numpy(),
+        "Order Date": order_date,
+        "Ship Date": ship_date,
+        "Ship Mode": rng.choice(ref["Ship Mode"].to_numpy(), size=n_rows),
+        "Customer ID": customer_id.to_numpy(),
+        "Customer Name": pick(customers, "Customer Name", base_customer),
+        "Segment": pick(customers, "Segment", base_customer),
+        "Country": pick(places, "Country", place_idx),
+        "City": pick(places, "City", place_idx),
+        "State": pick(places, "State", place_idx),
+        "Postal Code": pick(places, "Postal Code", place_idx),
+        "Region": pick(places, "Region", place_idx),
+        "Product ID": pick(products, "Product ID", product_idx),
+        "Category": category,
+        "Sub-Category": pick(products, "Sub-Category", product_idx),
+        "Product Name": pick(products, "Product Name", product_idx),
+        "Sales": sales,
+        "Quantity": rng.integers(1, 15, size=n_rows),
+        "Discount": discount,
+        "Profit": profit,
+    })
+    return preprocess(df)
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils import calculate as calc
+from utils.aggregate import clear_aggregates, stamp_version
+from utils.append import append_batch, open_dataset
+from utils.dialect import read_csv_bytes
+from utils.distinct import DISTINCT_GROUPS
+from utils.load import SAMPLE_PATH, preprocess
+
+ROOT = Path(__file__).resolve().parents[1]
+# The batch overlaps the base by OVERLAP rows, which the append must skip.
+BASE_ROWS, OVERLAP = 9000, 500
+
+
+@pytest.fixture(scope="module")
+def raw():
+    df, dialect = read_csv_bytes((ROOT / SAMPLE_PATH).read_bytes())
+    return df, dialect["date_format"]
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "compact"])
+def datasets(request, raw):
+    raw, date_format = raw
+    clear_aggregates()
+    base = preprocess(raw.iloc[:BASE_ROWS].copy(), date_format=date_format, compact=request.param)
+    full = preprocess(raw.copy(), date_format=date_format, compact=request.param)
+    stamp_version(base, f"base-{request.node.name}")
+    stamp_version(full, f"full-{request.node.name}")
+
+    state = open_dataset(base)
+    # Sketches built on the history are merged with the batch, not rebuilt.
+    for by in DISTINCT_GROUPS:
+        calc.distinct_summary(state["df"], by, mode="hll")
+    batch = raw.iloc[BASE_ROWS - OVERLAP:].copy()
+    added = append_batch(state, batch, date_format=date_format)
+    yield {"state": state, "full": full, "batch": batch, "added": added, "date_format": date_format}
+    clear_aggregates()
+
+
+def test_adds_only_new_rows(datasets):
+    assert datasets["added"] == len(datasets["full"]) - BASE_ROWS
+    assert len(datasets["state"]["df"]) == len(datasets["full"])
+
+
+@pytest.mark.parametrize("mode", ["exact", "hll"])
+def test_kpis_match_full_reload(datasets, mode):
+    appended = calc.get_basic_kpis(datasets["state"]["df"], distinct_mode=mode)
+    reloaded = calc.get_basic_kpis(datasets["full"], distinct_mode=mode)
+
+    assert appended.keys() == reloaded.keys()
+    for key, value in reloaded.items():
+        assert appended[key] == pytest.approx(value)
+
+
+@pytest.mark.parametrize("mode", ["exact", "hll"])
+@pytest.mark.parametrize("by", DISTINCT_GROUPS)
+def test_distinct_counts_match_full_reload(datasets, by, mode):
+    appended = calc.distinct_summary(datasets["state"]["df"], by, mode=mode)
+    reloaded = calc.distinct_summary(datasets["full"], by, mode=mode)
+
+    pd.testing.assert_frame_equal(appended, reloaded, check_dtype=False, check_categorical=False)
+
+
+def test_top_products_match_full_reload(datasets):
+    pd.testing.assert_frame_equal(
+        calc.top_products(datasets["state"]["df"]),
+        calc.top_products(datasets["full"]),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+def test_reappending_adds_nothing(datasets):
+    state = datasets["state"]
+    version, rows = state["df"].attrs["dataset_version"], state["rows"]
+
+    assert append_batch(state, datasets["batch"].copy(), date_format=datasets["date_format"]) == 0
+    assert state["rows"] == rows
+    assert state["df"].attrs["dataset_version"] == version
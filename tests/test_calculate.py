@@ -0,0 +1,88 @@
+import inspect
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils import calculate as calc
+from utils.aggregate import clear_aggregates, stamp_version
+from utils.dialect import read_csv_bytes
+from utils.load import SAMPLE_PATH, preprocess
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Every public utils.calculate function, with the arguments it is called
+# with here (more than once for functions whose options take other paths).
+CALLS = [
+    ("get_basic_kpis", {}),
+    ("get_basic_kpis", {"distinct_mode": "hll"}),
+    ("sales_trend", {}),
+    ("best_selling_month", {}),
+    ("discount_to_sales_ratio", {}),
+    ("category_performance_by_month", {}),
+    ("get_profit_margin", {}),
+    ("profit_margin_by_category", {}),
+    ("regional_summary", {}),
+    ("best_region", {}),
+    ("statewise_sales", {}),
+    ("country_sales", {}),
+    ("city_sales", {}),
+    ("unmatched_geo", {}),
+    ("top_products", {}),
+    ("bottom_products", {}),
+    ("segment_summary", {}),
+    ("best_segment", {}),
+    ("distinct_summary", {"by": "Region"}),
+    ("distinct_summary", {"by": "Region", "mode": "hll"}),
+    ("correlation_matrix", {}),
+    ("correlation_matrix", {"by": "Category", "method": "spearman"}),
+    ("detect_outliers", {}),
+    ("detect_outliers", {"by": None, "method": "mad"}),
+    ("detect_outliers", {"method": "iqr"}),
+    ("loss_drivers", {}),
+    ("shipping_summary", {}),
+    ("shipping_summary", {"by": None}),
+    ("lead_time_distribution", {}),
+    ("lead_time_distribution", {"by": "Ship Mode"}),
+    ("late_shipment_rate", {}),
+    ("sales_forecast", {}),
+    ("sales_forecast", {"by": "Region"}),
+]
+
+
+def _public_functions():
+    return {
+        name for name, func in inspect.getmembers(calc, inspect.isfunction)
+        if func.__module__ == calc.__name__ and not name.startswith("_")
+    }
+
+
+@pytest.fixture(scope="module")
+def sample():
+    raw_bytes = (ROOT / SAMPLE_PATH).read_bytes()
+    df, dialect = read_csv_bytes(raw_bytes)
+    return preprocess(df, date_format=dialect["date_format"])
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "compact"])
+def frame(request, sample):
+    # A fresh version per test, so every call computes instead of reusing a cached result.
+    clear_aggregates()
+    df = preprocess(sample.copy(), compact=request.param)
+    yield stamp_version(df, f"test-{request.node.name}")
+    clear_aggregates()
+
+
+def test_every_public_function_is_called():
+    assert _public_functions() == {name for name, _ in CALLS}
+
+
+@pytest.mark.parametrize(("name", "kwargs"), CALLS, ids=[f"{name}-{i}" for i, (name, _) in enumerate(CALLS)])
+def test_leaves_input_unchanged(frame, name, kwargs):
+    hashes = pd.util.hash_pandas_object(frame).to_numpy().copy()
+    dtypes = frame.dtypes.copy()
+
+    getattr(calc, name)(frame, **kwargs)
+
+    assert (pd.util.hash_pandas_object(frame).to_numpy() == hashes).all()
+    pd.testing.assert_series_equal(frame.dtypes, dtypes)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.correlation import CORRELATION_COLUMNS, build_moments, correlations, pearson
+from utils.stream import merge_groups
+
+
+@pytest.fixture(scope="module")
+def orders():
+    rng = np.random.default_rng(7)
+    n = 2_000
+    sales = rng.gamma(2.0, 100.0, n)
+    df = pd.DataFrame({
+        "Category": rng.choice(["Furniture", "Office Supplies", "Technology"], n),
+        "Region": rng.choice(["East", "West"], n),
+        "Sales": sales,
+        "Profit": 0.2 * sales + rng.normal(0, 30, n),
+        "Discount": rng.choice([0.0, 0.1, 0.2, 0.5], n),
+        "Quantity": rng.integers(1, 10, n).astype("float64"),
+    })
+    # Some missing values, so pairs drop rows independently.
+    df.loc[rng.choice(n, 50, replace=False), "Profit"] = np.nan
+    df.loc[rng.choice(n, 50, replace=False), "Discount"] = np.nan
+    return df
+
+
+def _expected(df, by, method):
+    columns = list(CORRELATION_COLUMNS)
+    if by is None:
+        return {"All": df[columns].corr(method=method)}
+    return {label: group[columns].corr(method=method) for label, group in df.groupby(by)}
+
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+@pytest.mark.parametrize("by", [None, "Category", "Region"])
+def test_matches_pandas_corr(orders, by, method):
+    result = correlations(orders, by=by, method=method)
+    expected = _expected(orders, by, method)
+
+    assert list(result.index.get_level_values(0).unique()) == list(expected)
+    for label, matrix in expected.items():
+        np.testing.assert_allclose(result.loc[label].to_numpy(), matrix.to_numpy(), atol=1e-9)
+
+
+@pytest.mark.parametrize("by", [None, "Category"])
+def test_merged_moments_match_pandas_corr(orders, by):
+    # The append path: moments of the history merged with moments of a batch.
+    history, batch = orders.iloc[:1_500], orders.iloc[1_500:]
+    merged = merge_groups(build_moments(history, by).copy(), build_moments(batch, by))
+
+    result = pearson(merged)
+    for label, matrix in _expected(orders, by, "pearson").items():
+        np.testing.assert_allclose(result.loc[label].to_numpy(), matrix.to_numpy(), atol=1e-9)
+
+
+def test_merge_adds_groups_missing_from_history(orders):
+    history = orders[orders["Category"] != "Technology"]
+    batch = orders[orders["Category"] == "Technology"]
+    merged = merge_groups(build_moments(history, "Category").copy(), build_moments(batch, "Category"))
+
+    pd.testing.assert_frame_equal(pearson(merged), correlations(orders, by="Category"), atol=1e-9)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.distinct import HLL_PRECISION, build_sketch, merge_sketches, sketch_counts
+
+# Relative standard error of HyperLogLog at the configured precision.
+STANDARD_ERROR = 1.04 / np.sqrt(2 ** HLL_PRECISION)
+
+
+def _orders(ids, regions):
+    return pd.DataFrame({"Order ID": [f"ORD-{i}" for i in ids], "Region": regions})
+
+
+@pytest.mark.parametrize("n", [1_000, 50_000, 300_000])
+def test_estimate_within_error_bound(n):
+    rng = np.random.default_rng(n)
+    ids = rng.permutation(n)
+    df = _orders(np.concatenate([ids, ids[: n // 2]]), "East")
+
+    estimate = sketch_counts(build_sketch(df, "Order ID")).iloc[0]
+
+    assert abs(estimate - n) / n < 4 * STANDARD_ERROR
+
+
+def test_estimate_per_group():
+    rng = np.random.default_rng(0)
+    regions = rng.choice(["East", "West", "South"], size=60_000)
+    df = _orders(np.arange(60_000), regions)
+
+    counts = sketch_counts(build_sketch(df, "Order ID", by="Region"))
+    exact = df.groupby("Region")["Order ID"].nunique()
+
+    assert list(counts.index) == list(exact.index)
+    assert (abs(counts - exact) / exact < 4 * STANDARD_ERROR).all()
+
+
+def test_merge_equals_sketch_of_union():
+    rng = np.random.default_rng(1)
+    a = _orders(rng.integers(0, 40_000, 30_000), rng.choice(["East", "West"], 30_000))
+    b = _orders(rng.integers(20_000, 60_000, 30_000), rng.choice(["West", "South"], 30_000))
+
+    merged = merge_sketches(build_sketch(a, "Order ID", by="Region"), build_sketch(b, "Order ID", by="Region"))
+    union = build_sketch(pd.concat([a, b], ignore_index=True), "Order ID", by="Region")
+
+    # Groups may come out in a different order; registers must match label for label.
+    rows = union["labels"].get_indexer(merged["labels"])
+    assert (rows >= 0).all() and len(rows) == len(union["labels"])
+    np.testing.assert_array_equal(merged["registers"], union["registers"][rows])
+    pd.testing.assert_series_equal(sketch_counts(merged), sketch_counts(union))
+
+
+def test_merge_with_missing_side():
+    sk = build_sketch(_orders(range(100), "East"), "Order ID")
+
+    assert merge_sketches(None, sk) is sk
+    assert merge_sketches(sk, None) is sk
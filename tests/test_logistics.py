@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import calculate as calc
+from utils.logistics import MAX_LEAD_DAYS, PERCENTILES, SHIP_TARGET_DAYS
+
+# Lead days per shipment: includes over-cap (a bad ship date) and negative
+# lead times (ship date before the order date), plus one missing ship date.
+LEADS = {
+    "Same Day": [0, 0, 1, 0, -2],
+    "First Class": [1, 2, 3, 4, 5, 2, 900],
+    "Second Class": [3, 4, 4, 5, 2, -1, 4, 400, None],
+    "Standard Class": [4, 5, 6, 7, 8, 5, 6, 5, 5, 12, 366],
+}
+
+
+@pytest.fixture
+def shipments():
+    modes, leads = zip(*[(mode, lead) for mode, values in LEADS.items() for lead in values])
+    order = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(len(leads)), unit="D")
+    ship = order + pd.to_timedelta([np.nan if lead is None else lead for lead in leads], unit="D")
+    return pd.DataFrame({"Order Date": order, "Ship Date": ship, "Ship Mode": list(modes)})
+
+
+def _known(values):
+    # Lead times that count as shipments: present and not negative.
+    return np.array([v for v in values if v is not None and v >= 0])
+
+
+@pytest.mark.parametrize("by", [None, "Ship Mode"])
+def test_percentiles_match_numpy(shipments, by):
+    summary = calc.shipping_summary(shipments, by=by)
+    groups = LEADS if by else {"All": [v for values in LEADS.values() for v in values]}
+
+    for label, values in groups.items():
+        row = summary[summary[by or "Group"] == label].iloc[0]
+        known = _known(values)
+        capped = np.minimum(known, MAX_LEAD_DAYS)
+        assert row["Shipments"] == len(known)
+        # Means use the exact lead times, percentiles the capped histogram.
+        assert row["Mean Days"] == pytest.approx(known.mean())
+        for q in PERCENTILES:
+            expected = np.percentile(capped, q * 100, method="inverted_cdf")
+            assert row[f"P{round(q * 100)}"] == expected
+
+
+def test_distribution_caps_lead_days(shipments):
+    dist = calc.lead_time_distribution(shipments)
+    known = _known([v for values in LEADS.values() for v in values])
+
+    assert dist["Lead Days"].max() == MAX_LEAD_DAYS
+    assert dist["Shipments"].sum() == len(known)
+    over_cap = dist.loc[dist["Lead Days"] == MAX_LEAD_DAYS, "Shipments"].item()
+    assert over_cap == (known >= MAX_LEAD_DAYS).sum()
+    expected = pd.Series(np.minimum(known, MAX_LEAD_DAYS)).value_counts().sort_index()
+    assert dist.set_index("Lead Days")["Shipments"].to_dict() == expected.to_dict()
+
+
+def test_late_rate(shipments):
+    late = shipped = 0
+    for mode, values in LEADS.items():
+        known = _known(values)
+        shipped += len(known)
+        late += (known > SHIP_TARGET_DAYS[mode]).sum()
+
+    assert calc.late_shipment_rate(shipments) == pytest.approx(late / shipped)
+    summary = calc.shipping_summary(shipments).set_index("Ship Mode")
+    for mode, values in LEADS.items():
+        known = _known(values)
+        assert summary.loc[mode, "Late Rate"] == pytest.approx((known > SHIP_TARGET_DAYS[mode]).mean())
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import calculate as calc
+from utils.aggregate import clear_aggregates, stamp_version
+from utils.dialect import read_csv_bytes
+from utils.load import SAMPLE_PATH, preprocess
+from utils.outliers import IQR_TO_STD, MAD_TO_STD, SCORE_COLUMNS, outlier_rows
+
+ROOT = Path(__file__).resolve().parents[1]
+THRESHOLDS = [1.5, 2.5, 3.5]
+
+
+@pytest.fixture(scope="module")
+def sample():
+    raw_bytes = (ROOT / SAMPLE_PATH).read_bytes()
+    df, dialect = read_csv_bytes(raw_bytes)
+    return preprocess(df, date_format=dialect["date_format"])
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "compact"])
+def frame(request, sample):
+    clear_aggregates()
+    df = preprocess(sample.copy(), compact=request.param)
+    yield stamp_version(df, f"test-{request.node.name}")
+    clear_aggregates()
+
+
+def _center_scale(values, groups, method):
+    # Straight pandas, one groupby per statistic.
+    if method == "zscore":
+        return groups.transform("mean"), groups.transform("std")
+    center = groups.transform("median")
+    if method == "mad":
+        deviation = (values - center).abs()
+        return center, MAD_TO_STD * deviation.groupby(groups.keys).transform("median")
+    iqr = groups.transform(lambda s: s.quantile(0.75) - s.quantile(0.25))
+    return center, IQR_TO_STD * iqr
+
+
+def _expected_rows(df, threshold, by, method):
+    keys = df[by].astype(object) if by is not None else pd.Series(0, index=df.index)
+    scores = []
+    for col in SCORE_COLUMNS:
+        values = df[col].astype("float64")
+        center, scale = _center_scale(values, values.groupby(keys.to_numpy()), method)
+        scores.append((values - center).abs() / scale.where(scale > 0))
+    score = pd.concat(scores, axis=1).max(axis=1)
+    return np.flatnonzero((score > threshold).to_numpy())
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+@pytest.mark.parametrize("method", ["zscore", "mad", "iqr"])
+@pytest.mark.parametrize("by", ["Category", "Sub-Category", None])
+def test_flags_match_pandas(frame, by, method, threshold):
+    rows = outlier_rows(frame, threshold, by=by, method=method)
+    expected = _expected_rows(frame, threshold, by, method)
+
+    assert len(rows) == len(expected)
+    np.testing.assert_array_equal(rows, expected)
+
+
+def test_default_groups_by_category(frame):
+    pd.testing.assert_frame_equal(
+        calc.detect_outliers(frame),
+        calc.detect_outliers(frame, 2.5, by="Category", method="zscore"),
+    )
+
+
+def test_global_baseline(frame):
+    # by=None scores every row against the whole dataset (the former default).
+    result = calc.detect_outliers(frame, 2.5, by=None)
+    flagged = frame.iloc[_expected_rows(frame, 2.5, None, "zscore")]
+    expected = flagged.groupby("Product Name", observed=True)[["Sales", "Profit", "Discount"]].mean()
+
+    assert set(result["Product Name"]) == set(expected.index)
+    np.testing.assert_allclose(
+        result.set_index("Product Name").loc[expected.index].to_numpy(), expected.to_numpy()
+    )
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_workers_do_not_rerun_the_script(tmp_path):
+    # Like app.py under Streamlit, the script runs as __main__ with a
+    # __file__; a worker that re-imports it leaves a second marker line.
+    marker = tmp_path / "imports.txt"
+    script = tmp_path / "script.py"
+    script.write_text(textwrap.dedent(f"""
+        import os
+        from utils.parallel import get_pool
+
+        with open({str(marker)!r}, "a") as f:
+            f.write("imported\\n")
+
+        if __name__ == "__main__":
+            assert get_pool().submit(os.getpid).result(timeout=60) != os.getpid()
+    """))
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, str(script)], check=True, env=env, cwd=tmp_path, timeout=120)
+    assert marker.read_text().splitlines() == ["imported"]
+
+
+def test_launching_workers_leaves_main_alone(tmp_path):
+    # Other Streamlit sessions run alongside the one starting the pool:
+    # __main__ must keep its __file__ and __spec__ throughout the launch.
+    script = tmp_path / "script.py"
+    script.write_text(textwrap.dedent("""
+        import sys
+        import threading
+        from utils import parallel
+
+        main = sys.modules["__main__"]
+        expected = (main.__file__, main.__spec__)
+        seen = set()
+        done = threading.Event()
+
+        def watch():
+            while not done.is_set():
+                seen.add((getattr(main, "__file__", None), getattr(main, "__spec__", None)))
+
+        watcher = threading.Thread(target=watch)
+        watcher.start()
+        pool = parallel.get_pool()
+        list(pool.map(abs, range(-4 * parallel.os.cpu_count(), 0)))
+        done.set()
+        watcher.join()
+        assert seen == {expected}, seen
+    """))
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, str(script)], check=True, env=env, cwd=tmp_path, timeout=120)
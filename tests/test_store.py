@@ -0,0 +1,16 @@
+from utils.append import KEY_COLUMNS
+from utils.filters import FILTER_DIMENSIONS
+from utils.forecast import FORECAST_GROUPS
+from utils.load import REQUIRED_COLUMNS
+from utils.store import DASHBOARD_COLUMNS
+
+
+def test_projection_covers_columns_read_elsewhere():
+    # Modules utils.store doesn't import (they pull in Streamlit or the
+    # forecasting stack) must still find their columns in the projection.
+    read = {*KEY_COLUMNS, *FILTER_DIMENSIONS, *FORECAST_GROUPS, *REQUIRED_COLUMNS}
+    assert read <= set(DASHBOARD_COLUMNS)
+
+
+def test_projection_has_no_duplicates():
+    assert len(DASHBOARD_COLUMNS) == len(set(DASHBOARD_COLUMNS))
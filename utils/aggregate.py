@@ -0,0 +1,196 @@
+import functools
+import itertools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Measures every shared group aggregate carries, so callers asking for
+# different subsets of the same grouping reuse one result.
+MEASURES = ["Sales", "Profit", "Discount", "Quantity"]
+
+# Dataset versions (including filtered views) whose aggregates are kept,
+# least recently used go first.
+MAX_VERSIONS = 32
+
+# Estimated bytes of cached results across versions. Many results hold a
+# value per row (group codes, sort orders, ranks), so a few filtered views
+# can outweigh the dataset; least recently used versions go first once
+# this is exceeded. The current version always stays.
+MAX_CACHE_BYTES = 512 * 1024 ** 2
+
+# Also hash every value around read-only calls (slow; for development).
+STRICT_READ_ONLY = os.environ.get("SALES_DASHBOARD_STRICT") == "1"
+
+
+# ============================================================
+# 🏷️ Dataset Versions
+# ============================================================
+
+_serials = itertools.count()
+_owners = weakref.WeakValueDictionary()
+
+
+def stamp_version(df, version):
+    """Tag a frame with the dataset version its aggregates are cached under."""
+    # The owner serial keeps frames derived from df (which inherit attrs)
+    # from being mistaken for the same dataset. Unlike id(df), a serial is
+    # never reused once its frame is garbage collected.
+    serial = next(_serials)
+    _owners[serial] = df
+    df.attrs["dataset_version"] = (version, serial)
+    return df
+
+
+def dataset_version(df):
+    """Version tag of df, or None if the frame was never stamped."""
+    tag = df.attrs.get("dataset_version")
+    if tag is None or _owners.get(tag[1]) is not df:
+        return None
+    return tag[0]
+
+
+# ============================================================
+# 🧮 Memoized Aggregates
+# ============================================================
+
+_results = OrderedDict()
+_sizes = {}
+_stats = {"hits": 0, "misses": 0}
+_lock = threading.Lock()
+
+
+def result_nbytes(result):
+    """Estimated in-memory size of a cached result (shallow for object values)."""
+    if isinstance(result, np.ndarray | pd.Index):
+        return result.nbytes
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True).sum())
+    if isinstance(result, pd.Series):
+        return int(result.memory_usage(index=True))
+    if isinstance(result, dict):
+        return sum(result_nbytes(value) for value in result.values())
+    if isinstance(result, list | tuple):
+        return sum(result_nbytes(value) for value in result)
+    return 0
+
+
+def _store(version, spec, result, nbytes):
+    # Callers hold _lock.
+    entries = _results.setdefault(version, {})
+    if spec in entries:
+        nbytes -= result_nbytes(entries[spec])
+    entries[spec] = result
+    _sizes[version] = _sizes.get(version, 0) + nbytes
+    _results.move_to_end(version)
+    total = sum(_sizes.values())
+    while len(_results) > 1 and (len(_results) > MAX_VERSIONS or total > MAX_CACHE_BYTES):
+        oldest, _ = _results.popitem(last=False)
+        total -= _sizes.pop(oldest, 0)
+
+
+def memoized(df, spec, compute):
+    """
+    Return compute() for this dataset version and spec, computing it once.
+    Results are shared between callers and must not be modified in place.
+    Unversioned frames are computed directly.
+    """
+    version = dataset_version(df)
+    if version is None:
+        with _lock:
+            _stats["misses"] += 1
+        return compute()
+
+    with _lock:
+        entries = _results.get(version)
+        if entries is not None:
+            _results.move_to_end(version)
+            if spec in entries:
+                _stats["hits"] += 1
+                return entries[spec]
+        _stats["misses"] += 1
+
+    result = compute()
+    nbytes = result_nbytes(result)
+
+    with _lock:
+        _store(version, spec, result, nbytes)
+    return result
+
+
+def has_result(df, spec):
+    """True if a result for spec is already cached for df's version."""
+    version = dataset_version(df)
+    with _lock:
+        return version is not None and spec in _results.get(version, {})
+
+
+def seed(df, spec, result):
+    """Store a result computed elsewhere (e.g. maintained incrementally) for df."""
+    version = dataset_version(df)
+    if version is None:
+        return
+    nbytes = result_nbytes(result)
+    with _lock:
+        _store(version, spec, result, nbytes)
+
+
+def versioned(func):
+    """Decorator: memoize func(df, *args) per dataset version."""
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        spec = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+        return memoized(df, spec, lambda: func(df, *args, **kwargs))
+    return wrapper
+
+
+def _fingerprint(df, strict):
+    shape = (len(df), tuple(df.columns), tuple(map(str, df.dtypes)))
+    if not strict:
+        return shape
+    return shape, int(pd.util.hash_pandas_object(df, index=True).sum())
+
+
+def read_only(func):
+    """
+    Decorator: func(df, ...) must not modify df. Added, dropped or retyped
+    columns always raise; with STRICT_READ_ONLY, so do changed values.
+    """
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        before = _fingerprint(df, STRICT_READ_ONLY)
+        result = func(df, *args, **kwargs)
+        if _fingerprint(df, STRICT_READ_ONLY) != before:
+            raise RuntimeError(f"{func.__qualname__} modified its input frame")
+        return result
+    return wrapper
+
+
+def totals(df):
+    """Memoized whole-frame sum, mean and count of the measures."""
+    return memoized(
+        df, ("totals",),
+        lambda: df[MEASURES].agg(["sum", "mean", "count"]),
+    )
+
+
+def cache_stats():
+    """Hit and miss counters, the number of cached dataset versions and their estimated bytes."""
+    with _lock:
+        return {**_stats, "versions": len(_results), "bytes": sum(_sizes.values())}
+
+
+def clear_aggregates():
+    """Drop every cached aggregate and reset the counters."""
+    with _lock:
+        _results.clear()
+        _sizes.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
@@ -0,0 +1,340 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from utils.aggregate import MEASURES, dataset_version, has_result, seed, stamp_version, totals
+from utils.correlation import CORRELATION_GROUPS, build_moments, moments
+from utils.cube import build_cube, get_cube
+from utils.dialect import read_csv_bytes
+from utils.distinct import (
+    DISTINCT_COLUMNS, DISTINCT_GROUPS, PERIOD_GROUP, build_sketch, distinct_count, merge_sketches, sketch,
+)
+from utils.load import DERIVED_COLUMNS, REQUIRED_COLUMNS, preprocess
+from utils.ranking import build_product_table, product_table
+from utils.timeseries import build_daily_store, daily_store
+from utils.stream import merge_groups
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# A row already in the dataset has the same values in these columns
+# (all shared columns are compared when one of them is missing).
+KEY_COLUMNS = ["Order ID", "Row ID"]
+
+
+# ============================================================
+# ➕ Incremental Append
+# ============================================================
+
+def key_columns(df):
+    """Columns that identify a row of df for de-duplication."""
+    if all(col in df.columns for col in KEY_COLUMNS):
+        return list(KEY_COLUMNS)
+    return list(df.columns)
+
+
+def row_keys(df, columns):
+    """64-bit hash per row of the key columns."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def sorted_distinct(keys):
+    """Sorted distinct values of a key array."""
+    # Sort and drop repeats: faster than np.unique's hash table for hashes.
+    keys = np.sort(keys)
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+
+def order_keys(df):
+    """Distinct 64-bit hashes of the Order IDs of df, sorted."""
+    ids = pd.Series(df["Order ID"].dropna().unique())
+    return sorted_distinct(pd.util.hash_pandas_object(ids, index=False).to_numpy())
+
+
+# Hashes seen so far are kept as a few sorted uint64 runs (8 bytes per key,
+# versus a set's ~70), never modified once built: a new run per append,
+# merged with the one before while it is at least as long, so there are
+# O(log keys) runs and each key is re-merged O(log keys) times.
+
+def contains(runs, keys):
+    """Mask of keys present in any of the sorted runs."""
+    found = np.zeros(len(keys), dtype=bool)
+    for run in runs:
+        if not len(run):
+            continue
+        positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+        found |= run[positions] == keys
+    return found
+
+
+def with_keys(runs, keys):
+    """A new list of runs that also holds keys (distinct and not yet present)."""
+    if not len(keys):
+        return runs
+    runs = [*runs, np.sort(keys)]
+    while len(runs) > 1 and len(runs[-1]) >= len(runs[-2]):
+        # Stable sort merges the two sorted halves in linear time.
+        runs[-2:] = [np.sort(np.concatenate(runs[-2:]), kind="stable")]
+    return runs
+
+
+# ============================================================
+# 🧱 Column Buffers
+# ============================================================
+# Appended rows are written past the end of per-column buffers that grow
+# by doubling, so an append copies the batch, not the history. Frames of
+# earlier versions keep viewing the rows they had, which never change.
+
+def _grown(buffer, needed):
+    if needed <= len(buffer):
+        return buffer
+    bigger = np.empty(max(needed, 2 * len(buffer)), dtype=buffer.dtype)
+    bigger[:len(buffer)] = buffer
+    return bigger
+
+
+def _arrow(series, type=None):
+    values = series.array.__arrow_array__()
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    return values if type is None or values.type == type else values.cast(type)
+
+
+def _open_column(series):
+    array = series.array
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return {"kind": "category", "dtype": series.dtype, "codes": series.cat.codes.to_numpy().copy()}
+    if isinstance(array, pd.arrays.IntegerArray | pd.arrays.FloatingArray | pd.arrays.BooleanArray):
+        return {
+            "kind": "masked", "dtype": series.dtype, "type": type(array),
+            "data": series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0),
+            "mask": series.isna().to_numpy(),
+        }
+    if HAS_PYARROW and hasattr(array, "__arrow_array__"):
+        return {"kind": "arrow", "dtype": series.dtype, "chunks": [_arrow(series)]}
+    if isinstance(array, pd.arrays.NumpyExtensionArray | pd.arrays.DatetimeArray | pd.arrays.TimedeltaArray):
+        return {"kind": "numpy", "dtype": series.dtype, "values": series.to_numpy().copy()}
+    return {"kind": "other", "dtype": series.dtype, "arrays": [array]}
+
+
+def _append_column(column, n_rows, series):
+    """
+    column with the rows of series written after its first n_rows. Returns a
+    new column dict; buffers are shared, and only written past n_rows.
+    """
+    column = dict(column)
+    end = n_rows + len(series)
+    if column["kind"] == "category":
+        column["codes"] = _grown(column["codes"], end)
+        column["codes"][n_rows:end] = series.cat.codes.to_numpy()
+    elif column["kind"] == "masked":
+        column["data"] = _grown(column["data"], end)
+        column["mask"] = _grown(column["mask"], end)
+        column["data"][n_rows:end] = series.to_numpy(dtype=column["dtype"].numpy_dtype, na_value=0)
+        column["mask"][n_rows:end] = series.isna().to_numpy()
+    elif column["kind"] == "arrow":
+        chunks = column["chunks"] + [_arrow(series, column["chunks"][0].type)]
+        # Merge tail chunks of similar size, so there are O(log rows) of them.
+        while len(chunks) > 1 and len(chunks[-1]) >= len(chunks[-2]):
+            chunks[-2:] = [pa.concat_arrays(chunks[-2:])]
+        column["chunks"] = chunks
+    elif column["kind"] == "numpy":
+        column["values"] = _grown(column["values"], end)
+        column["values"][n_rows:end] = series.to_numpy()
+    else:
+        column["arrays"] = column["arrays"] + [series.array]
+    return column
+
+
+def _column_array(column, n_rows):
+    if column["kind"] == "category":
+        return pd.Categorical.from_codes(column["codes"][:n_rows], dtype=column["dtype"], validate=False)
+    if column["kind"] == "masked":
+        return column["type"](column["data"][:n_rows], column["mask"][:n_rows])
+    if column["kind"] == "arrow":
+        return pd.array(pa.chunked_array(column["chunks"], type=column["chunks"][0].type), dtype=column["dtype"])
+    if column["kind"] == "numpy":
+        return column["values"][:n_rows]
+    arrays = column["arrays"]
+    return type(arrays[0])._concat_same_type(arrays)[:n_rows]
+
+
+def _frame(columns, n_rows):
+    # copy=False: every column stays a view of its buffer.
+    return pd.DataFrame({col: _column_array(column, n_rows) for col, column in columns.items()}, copy=False)
+
+
+def _aligned(columns, batch):
+    """
+    Cast batch to the buffered column dtypes. A categorical gains the new
+    categories of the batch; an integer column the batch doesn't fit in
+    becomes 64-bit. Returns the new column dicts, the cast batch and the
+    widened dtype per column.
+    """
+    columns = dict(columns)
+    cast, widened = {}, {}
+    for col, column in columns.items():
+        target, values = column["dtype"], batch[col]
+        if isinstance(target, pd.CategoricalDtype):
+            new = pd.Index(values.dropna().unique()).difference(target.categories)
+            if len(new):
+                # Appended categories keep the codes of existing rows.
+                target = pd.CategoricalDtype(target.categories.append(new), ordered=target.ordered)
+                columns[col] = {**column, "dtype": target}
+            cast[col] = values.astype(target)
+        elif pd.api.types.is_integer_dtype(target) and pd.api.types.is_integer_dtype(values):
+            # Nullable integers (e.g. Lead Time) carry their numpy type inside.
+            info = np.iinfo(getattr(target, "numpy_dtype", target))
+            present = values.dropna()
+            if present.empty or (present.min() >= info.min and present.max() <= info.max):
+                cast[col] = values.astype(target)
+            else:
+                widened[col] = pd.Int64Dtype() if hasattr(target, "numpy_dtype") else np.dtype("int64")
+                cast[col] = values.astype(widened[col])
+        else:
+            cast[col] = values.astype(target)
+    return columns, batch.assign(**cast), widened
+
+
+# ============================================================
+# ➕ Incremental Append
+# ============================================================
+
+def open_dataset(df):
+    """
+    Start an appendable dataset from a loaded frame. Copies the rows into
+    growable buffers and builds the row keys and maintained aggregates once;
+    later appends only touch the batch.
+    """
+    columns = key_columns(df)
+    stats = totals(df)
+    buffers = {col: _open_column(df[col]) for col in df.columns}
+    view = _frame(buffers, len(df))
+    view.attrs = dict(df.attrs)
+    return {
+        "base": dataset_version(df),
+        "df": stamp_version(view, dataset_version(df)) if dataset_version(df) else view,
+        "columns": buffers,
+        "rows": len(df),
+        "key_columns": columns,
+        "keys": [sorted_distinct(row_keys(df, columns))],
+        "sums": stats.loc["sum"].copy(),
+        "counts": stats.loc["count"].copy(),
+        "orders": [order_keys(df)],
+        "n_orders": distinct_count(df, "Order ID"),
+        "cube": get_cube(df).copy(),
+        "products": product_table(df).copy(),
+        "daily": daily_store(df).copy(),
+        "applied": set(),
+    }
+
+
+def append_batch(state, batch, date_format=None):
+    """
+    Append new order rows to an open dataset. Rows whose Order ID and Row ID
+    are already present (or repeated within the batch) are skipped. The
+    maintained aggregates and rollup cube are updated for the touched groups
+    only, on copies that replace the state's only once the new version is
+    built: a failing batch leaves the state as it was. date_format is the
+    batch file's (see utils.dialect). Returns the number of rows added.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in batch.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    history = state["df"]
+    missing = [col for col in history.columns if col not in batch.columns and col not in DERIVED_COLUMNS]
+    if missing:
+        raise ValueError(f"Batch lacks columns of the dataset: {', '.join(missing)}")
+
+    batch = preprocess(batch, date_format=date_format)[list(history.columns)]
+    keys = row_keys(batch, state["key_columns"])
+    fresh = ~pd.Series(keys).duplicated().to_numpy() & ~contains(state["keys"], keys)
+    batch, keys = batch[fresh].reset_index(drop=True), keys[fresh]
+    if batch.empty:
+        return 0
+
+    columns, batch, widened = _aligned(state["columns"], batch)
+    for col, dtype in widened.items():
+        # Rare: rebuffer this column's history once in the wider type.
+        columns[col] = _open_column(history[col].astype(dtype))
+    n_rows = state["rows"]
+    for col, column in columns.items():
+        columns[col] = _append_column(column, n_rows, batch[col])
+
+    sums = state["sums"] + batch[MEASURES].sum()
+    counts = state["counts"] + batch[MEASURES].count()
+    orders = order_keys(batch)
+    orders = orders[~contains(state["orders"], orders)]
+    cube = merge_groups(state["cube"].copy(), build_cube(batch))
+    products = merge_groups(state["products"].copy(), build_product_table(batch))
+    daily = merge_groups(state["daily"].copy(), build_daily_store(batch))
+
+    # Distinct-count sketches already built for the history absorb the batch.
+    carried = {}
+    for col in DISTINCT_COLUMNS.values():
+        for by in [None, *DISTINCT_GROUPS]:
+            spec = ("hll", col, by)
+            if has_result(history, spec) and by in (None, PERIOD_GROUP, *batch.columns):
+                carried[spec] = merge_sketches(sketch(history, col, by), build_sketch(batch, col, by))
+    # So do correlation moments; Spearman ranks are recomputed on demand.
+    for by in [None, *CORRELATION_GROUPS]:
+        spec = ("moments", by)
+        if has_result(history, spec) and by in (None, *batch.columns):
+            carried[spec] = merge_groups(moments(history, by).copy(), build_moments(batch, by))
+
+    df = _frame(columns, n_rows + len(batch))
+    df.attrs = {key: value for key, value in history.attrs.items() if key != "dataset_version"}
+    parent = dataset_version(history) or "local"
+    stamp_version(df, f"{parent}+{hashlib.blake2b(keys.tobytes(), digest_size=8).hexdigest()}")
+
+    # Everything is built: swap it into the state in one step.
+    state.update(
+        df=df, columns=columns, rows=n_rows + len(batch), sums=sums, counts=counts,
+        keys=with_keys(state["keys"], keys), orders=with_keys(state["orders"], orders),
+        n_orders=state["n_orders"] + len(orders), cube=cube, products=products, daily=daily,
+    )
+
+    # Hand the maintained results to the aggregate engine so the new
+    # version never re-scans the full history for them.
+    seed(df, ("totals",), pd.DataFrame(
+        [sums, sums / counts, counts], index=["sum", "mean", "count"]
+    )[MEASURES])
+    seed(df, ("distinct", "Order ID"), state["n_orders"])
+    seed(df, ("cube",), cube.copy())
+    seed(df, ("product_table",), products.copy())
+    seed(df, ("daily_store",), daily.copy())
+    for spec, merged in carried.items():
+        seed(df, spec, merged)
+    return len(batch)
+
+
+def append_sidebar(df):
+    """Sidebar uploader for daily order batches; returns the current dataset."""
+    with st.sidebar.expander("➕ Append Orders", expanded=False):
+        batch_file = st.file_uploader("New order batch (CSV)", type=["csv"], key="append_batch")
+
+    state = st.session_state.get("append_state")
+    if state is None or state["base"] != dataset_version(df):
+        if batch_file is None:
+            return df
+        state = open_dataset(df)
+        st.session_state["append_state"] = state
+
+    if batch_file is not None and batch_file.file_id not in state["applied"]:
+        try:
+            batch, dialect = read_csv_bytes(batch_file.getvalue())
+            added = append_batch(state, batch, dialect["date_format"])
+            state["applied"].add(batch_file.file_id)
+            st.sidebar.success(f"✅ {added:,} new rows appended.")
+        except Exception as e:
+            st.sidebar.error(f"Error appending batch: {e}")
+    return state["df"]
@@ -1,184 +1,294 @@
 import pandas as pd
 import numpy as np
+from utils.aggregate import MEASURES, read_only, totals, versioned
+from utils.correlation import correlations
+from utils.cube import cube_stat, rollup
+from utils.distinct import DISTINCT_COLUMNS, distinct_count
+from utils.forecast import DEFAULT_HORIZON, collect_forecasts, submit_forecasts
+from utils.geo import city_rollup, country_rollup, state_rollup, unmatched_locations
+from utils.logistics import late_rate, lead_time_counts, lead_time_summary
+from utils.outliers import outlier_summary
+from utils.perf import timed
+from utils.ranking import product_stat, product_table, ranked
+from utils.timeseries import timeseries
 
-def get_basic_kpis(df):
+@timed
+@read_only
+def get_basic_kpis(df, distinct_mode="exact"):
+    stats = totals(df)
     return {
-        "total_sales": df["Sales"].sum(),
-        "total_profit": df["Profit"].sum(),
-        "avg_discount": df["Discount"].mean(),
-        "total_orders": df["Order ID"].nunique(),
+        "total_sales": stats.loc["sum", "Sales"],
+        "total_profit": stats.loc["sum", "Profit"],
+        "avg_discount": stats.loc["mean", "Discount"],
+        "total_orders": distinct_count(df, "Order ID", mode=distinct_mode),
     }
 
-def sales_trend(df):
-    trend = (
-        df.groupby(df["Order Date"].dt.to_period("M"))
-        .sum(numeric_only=True)
-        .reset_index()
-    )
-    trend["Order Date"] = trend["Order Date"].astype(str)
+@timed
+@versioned
+@read_only
+def sales_trend(df, freq="M"):
+    """Measure totals per period of freq, rolled up from the daily buckets."""
+    trend = timeseries(df, freq)[MEASURES].reset_index()
+    periods = trend["Order Date"]
+    # Days and weeks are labelled by their first day.
+    if freq in ("D", "W"):
+        trend["Order Date"] = periods.dt.start_time.dt.strftime("%Y-%m-%d")
+    else:
+        trend["Order Date"] = periods.astype(str)
     return trend
 
+@timed
+@versioned
+@read_only
 def best_selling_month(df):
-    df["Month"] = df["Order Date"].dt.month_name()
-    month_sales = df.groupby("Month")["Sales"].sum().sort_values(ascending=False)
+    # Month names come from the shared daily-bucket rollup (one row per
+    # month), not from the per-row Order Month, so no extra pass over rows.
+    monthly = timeseries(df, "M")["Sales"]
+    month_names = monthly.index.strftime("%B").rename("Month")
+    month_sales = monthly.groupby(month_names).sum().sort_values(ascending=False)
     best_month = month_sales.idxmax()
     return best_month, month_sales
 
+@timed
+@versioned
+@read_only
 def discount_to_sales_ratio(df):
-    ratio = df.groupby("Category")[["Discount", "Sales"]].mean()
+    ratio = rollup(df, "Category", "mean")[["Discount", "Sales"]]
     ratio["Sales-to-Discount"] = ratio["Sales"] / ratio["Discount"].replace(0, np.nan)
     return ratio
 
+@timed
+@versioned
+@read_only
 def category_performance_by_month(df):
-    df["Month"] = df["Order Date"].dt.month_name()
-    return df.groupby(["Category", "Month"])[["Sales", "Profit"]].sum().reset_index()
+    # Rolled up from the daily buckets, like best_selling_month.
+    monthly = timeseries(df, "M", "Category")[["Sales", "Profit"]]
+    month_names = monthly.index.get_level_values("Order Date").strftime("%B").rename("Month")
+    categories = monthly.index.get_level_values("Category")
+    return monthly.groupby([categories, month_names], observed=True).sum().reset_index()
 
 
+@timed
+@read_only
 def get_profit_margin(df):
     """Compute overall profit margin (%)"""
-    total_sales = df["Sales"].sum()
-    total_profit = df["Profit"].sum()
+    stats = totals(df)
+    total_sales = stats.loc["sum", "Sales"]
+    total_profit = stats.loc["sum", "Profit"]
     margin = (total_profit / total_sales) * 100 if total_sales > 0 else 0
     return round(margin, 2)
 
 
+@timed
+@versioned
+@read_only
 def profit_margin_by_category(df):
     """Compute profit margin (%) per category"""
     category_margin = (
-        df.groupby("Category")[["Sales", "Profit"]]
-        .sum()
+        rollup(df, "Category")[["Sales", "Profit"]]
         .assign(Profit_Margin=lambda x: (x["Profit"] / x["Sales"]) * 100)
         .reset_index()
     )
     return category_margin
 
 
+@timed
+@versioned
+@read_only
 def regional_summary(df):
     """Aggregate sales and profit by region"""
     region_df = (
-        df.groupby("Region")[["Sales", "Profit"]]
-        .sum()
+        rollup(df, "Region")[["Sales", "Profit"]]
         .sort_values("Sales", ascending=False)
         .reset_index()
     )
     return region_df
 
 
+@timed
+@read_only
 def best_region(df):
     """Return the region with highest total sales"""
-    region_sales = df.groupby("Region")["Sales"].sum()
+    region_sales = rollup(df, "Region")["Sales"]
     return region_sales.idxmax()
 
 
+@timed
+@versioned
+@read_only
 def statewise_sales(df):
-    """Summarize sales and profit by state for choropleth map"""
-    state_df = (
-        df.groupby("State")[["Sales", "Profit"]]
-        .sum()
-        .reset_index()
-    )
+    """Summarize sales and profit by US state for choropleth map"""
+    states = state_rollup(df)
+    # Unresolved states are listed by unmatched_locations(), not mapped.
+    us = states[(states["Country Code"] == "USA") & states["State Code"].notna()]
+    if us["State Code"].duplicated().any():
+        # The same state spelled differently (or under "US" and "USA").
+        us = us.groupby("State Code", as_index=False).agg(
+            {"State": "first", "Sales": "sum", "Profit": "sum"}
+        ).sort_values("State")
+    return us[["State", "Sales", "Profit", "State Code"]].reset_index(drop=True)
 
-    # Mapping of full state names to abbreviations (USA)
-    us_state_abbrev = {
-        'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR',
-        'California': 'CA', 'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE',
-        'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL',
-        'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA',
-        'Maine': 'ME', 'Maryland': 'MD', 'Massachusetts': 'MA', 'Michigan': 'MI',
-        'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO', 'Montana': 'MT',
-        'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
-        'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND',
-        'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA',
-        'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD',
-        'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-        'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI',
-        'Wyoming': 'WY'
-    }
 
-    state_df["State Code"] = state_df["State"].map(us_state_abbrev)
-    state_df = state_df.dropna(subset=["State Code"])  # remove unrecognized states
-    return state_df
+@timed
+@versioned
+@read_only
+def country_sales(df):
+    """Sales and profit by country (ISO-3 codes) for the world map."""
+    countries = country_rollup(df)
+    return countries.dropna(subset=["Country Code"]).reset_index(drop=True)
+
+
+@timed
+@versioned
+@read_only
+def city_sales(df, n=15):
+    """Top n cities by sales, with their state codes."""
+    top = ranked(city_rollup(df), "Sales", n).reset_index(drop=True)
+    # Rollup labels are categoricals over every city; keep only the top ones.
+    return top.apply(lambda col: col.cat.remove_unused_categories() if col.dtype == "category" else col)
+
 
+@timed
+@versioned
+@read_only
+def unmatched_geo(df):
+    """Countries, states and postal codes that could not be resolved."""
+    return unmatched_locations(df)
+
+@timed
+@versioned
+@read_only
 def top_products(df, n=10):
     """Top n products by total sales"""
-    top_df = (
-        df.groupby("Product Name")[["Sales", "Profit"]]
-        .sum()
-        .sort_values("Sales", ascending=False)
-        .head(n)
-        .reset_index()
-    )
-    return top_df
+    sums = product_stat(df, "sum")[["Sales", "Profit"]]
+    return ranked(sums, "Sales", n).reset_index()
 
 
+@timed
+@versioned
+@read_only
 def bottom_products(df, n=10):
     """Bottom n products by total profit (lowest first)"""
-    bottom_df = (
-        df.groupby("Product Name")[["Sales", "Profit"]]
-        .sum()
-        .sort_values("Profit", ascending=True)
-        .head(n)
-        .reset_index()
-    )
-    return bottom_df
+    sums = product_stat(df, "sum")[["Sales", "Profit"]]
+    return ranked(sums, "Profit", n, largest=False).reset_index()
 
+@timed
+@versioned
+@read_only
 def segment_summary(df):
     """Aggregate sales, profit, and discount by customer segment."""
+    seg_sums = rollup(df, "Segment")
     seg_df = (
-        df.groupby("Segment")[["Sales", "Profit", "Discount"]]
-        .mean(numeric_only=True)
+        rollup(df, "Segment", "mean")[["Sales", "Profit", "Discount"]]
         .reset_index()
     )
-    seg_df["Total_Sales"] = df.groupby("Segment")["Sales"].sum().values
+    seg_df["Total_Sales"] = seg_sums["Sales"].values
     seg_df["Profit_Margin(%)"] = (
-        df.groupby("Segment")["Profit"].sum().values
-        / df.groupby("Segment")["Sales"].sum().values
+        seg_sums["Profit"].values / seg_sums["Sales"].values
     ) * 100
     return seg_df
 
 
+@timed
+@read_only
 def best_segment(df):
     """Return segment with highest total sales."""
-    seg_sales = df.groupby("Segment")["Sales"].sum()
+    seg_sales = rollup(df, "Segment")["Sales"]
     return seg_sales.idxmax()
 
 
-def correlation_matrix(df):
-    """Compute correlation matrix for key numeric features."""
-    numeric_cols = ["Sales", "Profit", "Discount", "Quantity"]
-    available_cols = [col for col in numeric_cols if col in df.columns]
-    corr = df[available_cols].corr(numeric_only=True)
+@timed
+@versioned
+@read_only
+def distinct_summary(df, by, mode="exact"):
+    """Distinct orders, customers and products per group ("exact" or "hll")."""
+    counts = {
+        label: distinct_count(df, col, by, mode=mode)
+        for label, col in DISTINCT_COLUMNS.items()
+        if col in df.columns
+    }
+    return pd.DataFrame(counts).rename_axis(by).reset_index()
+
+
+@timed
+@versioned
+@read_only
+def correlation_matrix(df, by=None, method="pearson"):
+    """
+    Correlation matrix for key numeric features ("pearson" or "spearman").
+    With `by`, one matrix per group, stacked as (group, feature) rows.
+    """
+    if by is not None and by not in df.columns:
+        by = None
+    corr = correlations(df, by, method)
+    if by is None:
+        corr = corr.loc["All"]
     return corr.round(2)
 
-def detect_outliers(df, z_thresh=2.5):
+@timed
+@versioned
+@read_only
+def detect_outliers(df, z_thresh=2.5, by="Category", method="zscore"):
     """
     Detect products with abnormal discount or profit behavior.
-    Uses Z-score to identify outliers.
+    Rows are scored against their own `by` group (None for the whole dataset)
+    with z-scores or robust "mad" / "iqr" scores.
     """
-    outlier_cols = ["Sales", "Profit", "Discount"]
-    numeric_df = df[outlier_cols].copy()
-
-    # Compute z-scores
-    z_scores = (numeric_df - numeric_df.mean()) / numeric_df.std()
-    outliers = df[(abs(z_scores["Profit"]) > z_thresh) | (abs(z_scores["Discount"]) > z_thresh)]
-
-    # Summarize by product
-    summary = (
-        outliers.groupby("Product Name")[["Sales", "Profit", "Discount"]]
-        .mean()
-        .sort_values("Profit", ascending=True)
-        .reset_index()
-    )
-    return summary
+    if by is not None and by not in df.columns:
+        by = None
+    return outlier_summary(df, z_thresh, by=by, method=method)
 
 
+@timed
+@versioned
+@read_only
 def loss_drivers(df):
     """Find products consistently yielding negative profit."""
+    # A negative mean profit is a negative total, so only losers are averaged.
+    table = product_table(df)
+    losers = table[table[("Profit", "sum")].to_numpy() < 0]
     loss_df = (
-        df.groupby("Product Name")[["Sales", "Profit", "Discount"]]
-        .mean()
-        .query("Profit < 0")
+        cube_stat(losers, "mean")[["Sales", "Profit", "Discount"]]
         .sort_values("Profit")
         .reset_index()
     )
     return loss_df
+
+
+@timed
+@versioned
+@read_only
+def shipping_summary(df, by="Ship Mode"):
+    """Lead-time percentiles and late-shipment rate per group (None: overall)."""
+    if by is not None and by not in df.columns:
+        by = None
+    return lead_time_summary(df, by)
+
+
+@timed
+@versioned
+@read_only
+def lead_time_distribution(df, by=None):
+    """Shipments per lead-time day, optionally split by group."""
+    if by is not None and by not in df.columns:
+        by = None
+    return lead_time_counts(df, by)
+
+
+@timed
+@read_only
+def late_shipment_rate(df):
+    """Share of shipments that left later than their ship mode's target."""
+    return late_rate(df)
+
+
+@timed
+@read_only
+def sales_forecast(df, by=None, horizon=DEFAULT_HORIZON):
+    """
+    Monthly sales history and forecast per group (None: overall). Models fit
+    in the background: returns the finished groups and how many are pending.
+    """
+    if by is not None and by not in df.columns:
+        by = None
+    return collect_forecasts(submit_forecasts(df, by, horizon), by)
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+from utils.aggregate import memoized
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Most points a line trace sends to the browser; longer series are
+# downsampled with LTTB, which keeps their visual shape.
+POINT_BUDGET = 2_000
+
+# Marker-only traces above WEBGL_POINTS render with WebGL; above
+# BIN_POINTS they are binned into a BIN_COUNT x BIN_COUNT density grid.
+WEBGL_POINTS = 1_000
+BIN_POINTS = 50_000
+BIN_COUNT = 80
+
+# Per-point trace properties that follow a downsampled trace's points.
+_POINT_PROPERTIES = ["x", "y", "customdata", "text", "hovertext", "ids"]
+_MARKER_PROPERTIES = ["color", "size", "symbol", "opacity"]
+
+# Figures kept per dataset version, least recently shown go first. Widget
+# values (e.g. slider positions) are part of a figure's key, so without a
+# limit every value ever picked would stay cached.
+MAX_FIGURES = 24
+
+
+# ============================================================
+# 📉 Point Reduction
+# ============================================================
+
+def _numeric(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype("float64")
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype("float64")
+    # Categories are evenly spaced along the axis.
+    return np.arange(len(values), dtype="float64")
+
+
+def lttb(x, y, n_out):
+    """
+    Indices of n_out points of the series (x, y) picked by Largest-Triangle-
+    Three-Buckets: the first and last points, and per bucket the point that
+    spans the largest triangle with its neighbours.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _numeric(x)
+    y = np.nan_to_num(np.asarray(y, dtype="float64"))
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+
+    picked = np.empty(n_out, dtype=np.intp)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average (or the last point) closes the triangle.
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def _subset(trace, keep, n):
+    # Same trace with only the kept points of every per-point property.
+    props = trace.to_plotly_json()
+    for name in _POINT_PROPERTIES:
+        value = props.get(name)
+        if value is not None and np.ndim(value) >= 1 and len(value) == n:
+            props[name] = np.asarray(value)[keep]
+    marker = props.get("marker") or {}
+    for name in _MARKER_PROPERTIES:
+        value = marker.get(name)
+        if value is not None and np.ndim(value) == 1 and len(value) == n:
+            marker[name] = np.asarray(value)[keep]
+    return type(trace)(props)
+
+
+def _binned(trace):
+    marker = trace.marker.to_plotly_json() if trace.marker else {}
+    return go.Histogram2d(
+        x=trace.x, y=trace.y, name=trace.name, nbinsx=BIN_COUNT, nbinsy=BIN_COUNT,
+        colorscale=marker.get("colorscale") or "YlGn", showscale=False,
+        xaxis=trace.xaxis, yaxis=trace.yaxis,
+    )
+
+
+def reduce_figure(fig, budget=POINT_BUDGET):
+    """
+    Cap the points a figure sends to the browser: long line traces are
+    downsampled to `budget` points, large marker traces switch to WebGL
+    (plotly express may already have) and very large ones are binned.
+    Other traces are left as they are.
+    """
+    traces, changed = [], False
+    for trace in fig.data:
+        if trace.type not in ("scatter", "scattergl") or trace.x is None:
+            traces.append(trace)
+            continue
+        n, mode = len(trace.x), trace.mode or "lines"
+        if "lines" in mode and n > budget:
+            trace = _subset(trace, lttb(trace.x, trace.y, budget), n)
+        elif mode == "markers" and n > BIN_POINTS:
+            trace = _binned(trace)
+        elif mode == "markers" and n > WEBGL_POINTS and trace.type == "scatter":
+            props = trace.to_plotly_json()
+            props.pop("type", None)
+            trace = go.Scattergl(props, skip_invalid=True)
+        else:
+            traces.append(trace)
+            continue
+        traces.append(trace)
+        changed = True
+    if not changed:
+        return fig
+    return go.Figure(data=traces, layout=fig.layout)
+
+
+# ============================================================
+# 🗃️ Figure Cache
+# ============================================================
+
+_figures_lock = threading.Lock()
+
+
+def cached_figure(df, key, build, budget=POINT_BUDGET):
+    """
+    Figure from build(), reduced for transfer and kept per dataset version
+    (a filtered view has its own version) and key: the chart id plus theme
+    and any widget values the figure depends on. Treat it as read-only.
+    Each version keeps its MAX_FIGURES most recently used figures.
+    """
+    # The version's figure LRU is cached (and evicted) with its aggregates.
+    figures = memoized(df, ("figures",), OrderedDict)
+    with _figures_lock:
+        if key in figures:
+            figures.move_to_end(key)
+            return figures[key]
+
+    fig = reduce_figure(build(), budget)
+
+    with _figures_lock:
+        figures[key] = fig
+        figures.move_to_end(key)
+        while len(figures) > MAX_FIGURES:
+            figures.popitem(last=False)
+    return fig
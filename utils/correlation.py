@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import MEASURES, memoized
+from utils.distinct import group_codes
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+CORRELATION_COLUMNS = MEASURES
+CORRELATION_GROUPS = ["Category", "Region"]
+CORRELATION_METHODS = ["pearson", "spearman"]
+
+# Per column pair (x, y), over rows where both are present: row count,
+# sums, sums of squares and the cross-product sum.
+PAIR_STATS = ["n", "sx", "sy", "sxx", "syy", "sxy"]
+
+
+# ============================================================
+# ➕ Mergeable Moments
+# ============================================================
+
+def _pair_moments(values, codes, labels, by):
+    keep = codes >= 0
+    codes = codes[keep]
+    n_groups = len(labels)
+    columns = list(values)
+    arrays = {col: np.asarray(values[col], dtype="float64")[keep] for col in columns}
+    present = {col: ~np.isnan(array) for col, array in arrays.items()}
+
+    data = {}
+    for i, x_col in enumerate(columns):
+        for y_col in columns[i:]:
+            both = present[x_col] & present[y_col]
+            x = np.where(both, arrays[x_col], 0.0)
+            y = np.where(both, arrays[y_col], 0.0)
+            for stat, weights in zip(PAIR_STATS, (both, x, y, x * x, y * y, x * y)):
+                data[(x_col, y_col, stat)] = np.bincount(codes, weights=weights, minlength=n_groups)
+
+    moments = pd.DataFrame(data, index=pd.Index(labels, name=by))
+    moments.columns = pd.MultiIndex.from_tuples(moments.columns, names=["x", "y", "stat"])
+    return moments
+
+
+def build_moments(df, by=None):
+    """
+    Pairwise moments of CORRELATION_COLUMNS per `by` group (one "All" row
+    when by is None), in one pass over the rows. Moments of different
+    chunks add up, so they merge per group like the rollup cube.
+    """
+    columns = [col for col in CORRELATION_COLUMNS if col in df.columns]
+    codes, labels = group_codes(df, by)
+    values = {col: df[col].to_numpy(dtype="float64", na_value=np.nan) for col in columns}
+    return _pair_moments(values, codes, labels, by)
+
+
+def moments(df, by=None):
+    """Pairwise moments for df, built once per dataset version."""
+    return memoized(df, ("moments", by), lambda: build_moments(df, by))
+
+
+def ranks(df, by=None):
+    """Average ranks of each correlation column within its `by` group, cached per version."""
+    def compute():
+        columns = [col for col in CORRELATION_COLUMNS if col in df.columns]
+        codes, _ = group_codes(df, by)
+        return df[columns].groupby(codes).rank()
+
+    return memoized(df, ("ranks", by), compute)
+
+
+def rank_moments(df, by=None):
+    """
+    Pairwise moments of the within-group ranks (for Spearman), cached per
+    version. Pairs with missing values are re-ranked over the rows where
+    both columns are present, as DataFrame.corr does.
+    """
+    def compute():
+        codes, labels = group_codes(df, by)
+        ranked = ranks(df, by)
+        values = {col: ranked[col].to_numpy(dtype="float64", na_value=np.nan) for col in ranked.columns}
+        result = _pair_moments(values, codes, labels, by)
+
+        columns = list(ranked.columns)
+        missing = {col: np.isnan(values[col]) for col in columns}
+        for i, x_col in enumerate(columns):
+            for y_col in columns[i + 1:]:
+                if (missing[x_col] == missing[y_col]).all():
+                    continue
+                both = ~(missing[x_col] | missing[y_col])
+                pair = df.loc[both, [x_col, y_col]].groupby(codes[both]).rank()
+                pair_values = {col: pair[col].to_numpy(dtype="float64", na_value=np.nan) for col in pair.columns}
+                partial = _pair_moments(pair_values, codes[both], labels, by)
+                for stat in PAIR_STATS:
+                    result[(x_col, y_col, stat)] = partial[(x_col, y_col, stat)].to_numpy()
+        return result
+
+    return memoized(df, ("rank_moments", by), compute)
+
+
+# ============================================================
+# 🔗 Correlations
+# ============================================================
+
+def pearson(moments):
+    """
+    Pearson correlation matrix per group of a moments frame: rows are
+    (group, column) pairs in group order, columns the correlation columns.
+    """
+    moments = moments.sort_index()
+    columns = list(dict.fromkeys(moments.columns.get_level_values("x")))
+    k = len(columns)
+    r = np.full((len(moments), k, k), np.nan)
+    for i, x_col in enumerate(columns):
+        for j in range(i, k):
+            n, sx, sy, sxx, syy, sxy = (moments[(x_col, columns[j], stat)].to_numpy() for stat in PAIR_STATS)
+            var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                value = np.where(var > 0, (n * sxy - sx * sy) / np.sqrt(var), np.nan)
+            if i == j:
+                value = np.where(var > 0, 1.0, np.nan)
+            r[:, i, j] = r[:, j, i] = np.clip(value, -1.0, 1.0)
+
+    index = pd.MultiIndex.from_product([moments.index, columns], names=[moments.index.name or "Group", None])
+    return pd.DataFrame(r.reshape(-1, k), index=index, columns=columns)
+
+
+def correlations(df, by=None, method="pearson"):
+    """
+    Correlation matrices per `by` group ("pearson" from the pairwise moments,
+    "spearman" from the cached ranks), stacked as (group, column) rows.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    if method == "pearson":
+        return pearson(moments(df, by))
+    return pearson(rank_moments(df, by))
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import MEASURES, memoized
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Low-cardinality dimensions from COLUMN_GROUPS (Product, Geography, Customer)
+# that the rollup cube is keyed on.
+CUBE_DIMENSIONS = ["Category", "Region", "Segment", "State"]
+
+CUBE_STATS = ["sum", "count", "sumsq"]
+
+
+# ============================================================
+# 🧊 Rollup Cube
+# ============================================================
+
+def build_cube(df, dims=None):
+    """
+    Sum, non-null count and sum of squares of every measure at the finest
+    grain of dims (default: the available cube dimensions), built in one
+    pass over the rows. Columns are (measure, stat) pairs.
+    """
+    if dims is None:
+        dims = [col for col in CUBE_DIMENSIONS if col in df.columns]
+    groups = df.groupby(dims, observed=True, dropna=False, sort=False)
+    codes = groups.ngroup().to_numpy()
+    n_groups = groups.ngroups
+
+    data = {}
+    for measure in MEASURES:
+        values = df[measure].to_numpy(dtype="float64", na_value=np.nan)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        data[(measure, "sum")] = np.bincount(codes, weights=filled, minlength=n_groups)
+        data[(measure, "count")] = np.bincount(codes, weights=present, minlength=n_groups)
+        data[(measure, "sumsq")] = np.bincount(codes, weights=filled * filled, minlength=n_groups)
+
+    index = groups.size().index
+    cube = pd.DataFrame(data, index=index)
+    cube.columns = pd.MultiIndex.from_tuples(cube.columns, names=["measure", "stat"])
+    return cube
+
+
+def get_cube(df):
+    """Rollup cube for df, built once per dataset version."""
+    return memoized(df, ("cube",), lambda: build_cube(df))
+
+
+def _stat(level, stat):
+    return level.xs(stat, axis=1, level="stat").rename_axis(columns=None)
+
+
+def cube_stat(level, stat):
+    """One column per measure of stat ("sum", "count", "sumsq", "mean" or "std")."""
+    if stat in CUBE_STATS:
+        return _stat(level, stat)
+    sums = _stat(level, "sum")
+    counts = _stat(level, "count")
+    if stat == "mean":
+        return sums / counts.replace(0, np.nan)
+    if stat == "std":
+        sumsq = _stat(level, "sumsq")
+        var = (sumsq - sums ** 2 / counts.replace(0, np.nan)) / (counts - 1).replace(0, np.nan)
+        return np.sqrt(var.clip(lower=0))
+    raise ValueError(f"Unknown rollup stat: {stat}")
+
+
+def rollup(df, dims, stat="sum"):
+    """
+    Roll the cube up to dims and return one column per measure.
+    stat is one of "sum", "count", "sumsq", "mean" or "std".
+    """
+    dims = [dims] if isinstance(dims, str) else list(dims)
+
+    def compute():
+        # Rows with a missing key in dims are dropped, as in a direct groupby.
+        return get_cube(df).groupby(level=dims, observed=True).sum()
+
+    return cube_stat(memoized(df, ("rollup", tuple(dims)), compute), stat)
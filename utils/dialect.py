@@ -0,0 +1,214 @@
+import codecs
+import csv
+import io
+import logging
+import re
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import chardet
+    HAS_CHARDET = True
+except ImportError:
+    HAS_CHARDET = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Bytes from the start of a file the dialect is detected from.
+SNIFF_BYTES = 64 * 1024
+
+DELIMITERS = [",", ";", "\t", "|"]
+
+# Used when no detected encoding reads the data; decodes any bytes.
+FALLBACK_ENCODING = "latin-1"
+
+# Tried in order; the first that reads every sampled date wins, so
+# month-first beats day-first when both fit (as pandas assumes).
+DATE_COLUMNS = ["Order Date", "Ship Date"]
+DATE_FORMATS = [
+    "%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d", "%Y/%m/%d", "%d.%m.%Y",
+    "%m-%d-%Y", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S", "%m/%d/%Y %H:%M",
+]
+
+# Parsed as these types rather than inferred.
+MEASURE_TYPES = {"Sales": "float64", "Profit": "float64", "Discount": "float64", "Quantity": "int64"}
+
+_COMMA_DECIMAL = re.compile(r"^-?\d+,\d+$")
+_POINT_DECIMAL = re.compile(r"^-?\d+\.\d+$")
+
+
+# ============================================================
+# 🔎 Dialect Detection
+# ============================================================
+
+def _decodes(sample, encoding):
+    # A sample may end mid-character, so the tail is allowed to be partial.
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def detect_encoding(sample):
+    """Encoding of a byte sample: BOMs first, then UTF-8, then chardet's guess."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    if _decodes(sample, "utf-8"):
+        return "utf-8"
+    if HAS_CHARDET:
+        guess = chardet.detect(sample)["encoding"]
+        if guess and _decodes(sample, guess):
+            return codecs.lookup(guess).name
+    return FALLBACK_ENCODING
+
+
+def _sample_rows(sample, encoding, delimiter):
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(sample, final=False)
+    # The last line may be cut off by the sample boundary.
+    lines = text.splitlines()[:-1] if len(sample) >= SNIFF_BYTES else text.splitlines()
+    return list(csv.reader(lines, delimiter=delimiter))
+
+
+def detect_delimiter(sample, encoding):
+    """The delimiter giving the widest header that every sampled row matches."""
+    best, best_width = ",", 1
+    for delimiter in DELIMITERS:
+        rows = [row for row in _sample_rows(sample, encoding, delimiter) if row]
+        if not rows:
+            continue
+        width = len(rows[0])
+        # Quoted fields can span lines, so a few ragged rows are tolerated.
+        consistent = sum(len(row) == width for row in rows) >= 0.9 * len(rows)
+        if consistent and width > best_width:
+            best, best_width = delimiter, width
+    return best
+
+
+def _column_values(rows, columns):
+    header = rows[0] if rows else []
+    values = {}
+    for col in columns:
+        if col in header:
+            i = header.index(col)
+            values[col] = [row[i].strip() for row in rows[1:] if len(row) > i and row[i].strip()]
+    return values
+
+
+def detect_decimal(values):
+    """"," if the sampled measures are written with decimal commas, else "."."""
+    numbers = [value for column in values.values() for value in column]
+    if any(_POINT_DECIMAL.match(value) for value in numbers):
+        return "."
+    return "," if any(_COMMA_DECIMAL.match(value) for value in numbers) else "."
+
+
+def detect_date_format(values):
+    """First of DATE_FORMATS that reads every sampled date, or None."""
+    dates = [value for column in values.values() for value in column]
+    if not dates:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            for value in dates:
+                datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return fmt
+    return None
+
+
+def sniff(sample, encoding=None):
+    """
+    CSV dialect of a byte sample (the first SNIFF_BYTES of a file): a dict
+    of "encoding" (detected unless given), "delimiter", "decimal" separator
+    and the "date_format" of the date columns (None if none fits).
+    """
+    sample = sample[:SNIFF_BYTES]
+    encoding = encoding or detect_encoding(sample)
+    delimiter = detect_delimiter(sample, encoding)
+    rows = _sample_rows(sample, encoding, delimiter)
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "decimal": detect_decimal(_column_values(rows, MEASURE_TYPES)) if delimiter != "," else ".",
+        "date_format": detect_date_format(_column_values(rows, DATE_COLUMNS)),
+    }
+
+
+def sniff_file(file, encoding=None):
+    """Dialect of an open binary file, read from its current position (which is kept)."""
+    start = file.tell()
+    sample = file.read(SNIFF_BYTES)
+    file.seek(start)
+    return sniff(sample, encoding)
+
+
+def pandas_options(dialect):
+    """pd.read_csv keyword arguments for a dialect."""
+    return {
+        "encoding": dialect["encoding"],
+        "sep": dialect["delimiter"],
+        "decimal": dialect["decimal"],
+    }
+
+
+# ============================================================
+# 📥 One-Pass Parsing
+# ============================================================
+
+def _read_arrow(raw_bytes, dialect):
+    types = {col: pa.type_for_alias(dtype) for col, dtype in MEASURE_TYPES.items()}
+    parsers = []
+    if dialect["date_format"]:
+        types.update({col: pa.timestamp("us") for col in DATE_COLUMNS})
+        parsers = [dialect["date_format"]]
+    table = pa_csv.read_csv(
+        io.BytesIO(raw_bytes),
+        read_options=pa_csv.ReadOptions(encoding=dialect["encoding"]),
+        parse_options=pa_csv.ParseOptions(delimiter=dialect["delimiter"]),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=types, timestamp_parsers=parsers, decimal_point=dialect["decimal"],
+        ),
+    )
+    return table.to_pandas()
+
+
+def _read_pandas(raw_bytes, dialect):
+    try:
+        return pd.read_csv(io.BytesIO(raw_bytes), **pandas_options(dialect))
+    except UnicodeDecodeError:
+        # Bytes past the sample the detected encoding can't read.
+        logger.info("re-reading CSV as %s", FALLBACK_ENCODING)
+        return pd.read_csv(io.BytesIO(raw_bytes), **pandas_options({**dialect, "encoding": FALLBACK_ENCODING}))
+
+
+def read_csv_bytes(raw_bytes, encoding=None):
+    """
+    Parse CSV bytes in one pass with the dialect sniffed from their start.
+    With pyarrow, the multithreaded Arrow reader parses the measures and
+    (when their format was detected) the date columns with explicit types;
+    files it rejects, e.g. with malformed dates, are read by pandas instead.
+    Returns the frame and the dialect.
+    """
+    dialect = sniff(raw_bytes, encoding)
+    if HAS_PYARROW:
+        try:
+            return _read_arrow(raw_bytes, dialect), dialect
+        except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+            logger.info("Arrow CSV reader failed, using pandas: %s", e)
+    return _read_pandas(raw_bytes, dialect), dialect
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import memoized
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+DISTINCT_MODES = ["exact", "hll"]
+
+# Entities counted per group in distinct summaries: label -> column.
+DISTINCT_COLUMNS = {
+    "Orders": "Order ID",
+    "Customers": "Customer ID",
+    "Products": "Product Name",
+}
+
+# Groupings for distinct summaries; PERIOD_GROUP is the month of Order Date.
+PERIOD_GROUP = "Year-Month"
+DISTINCT_GROUPS = ["Region", "Segment", PERIOD_GROUP]
+
+# HyperLogLog registers per sketch are 2 ** HLL_PRECISION (about 0.8%
+# standard error at 14); one byte each.
+HLL_PRECISION = 14
+
+
+# ============================================================
+# 🔢 Factorized Codes
+# ============================================================
+
+def month_ordinals(df):
+    """
+    Monthly period ordinal per row (months since 1970-01), from the derived
+    Order Year and Order Month columns when present.
+    """
+    if "Order Year" in df.columns and "Order Month" in df.columns:
+        years = df["Order Year"].to_numpy(dtype=np.int64)
+        return (years - 1970) * 12 + df["Order Month"].to_numpy(dtype=np.int64) - 1
+    return df["Order Date"].dt.to_period("M").array.asi8
+
+
+def _factorize(df, column):
+    if column == PERIOD_GROUP and column not in df.columns:
+        codes, ordinals = pd.factorize(month_ordinals(df))
+        return codes, pd.PeriodIndex.from_ordinals(ordinals, freq="M")
+    return pd.factorize(df[column])
+
+
+def factorized(df, column):
+    """Integer code per row (-1 for missing) and the distinct values, once per version."""
+    return memoized(df, ("factorized", column), lambda: _factorize(df, column))
+
+
+def group_codes(df, by):
+    """Integer group code per row (-1 for missing) and the group labels (None: one group)."""
+    if by is None:
+        return np.zeros(len(df), dtype=np.intp), pd.Index(["All"])
+    return factorized(df, by)
+
+
+def _exact(df, column, by):
+    values, uniques = factorized(df, column)
+    if by is None:
+        return len(uniques)
+    groups, labels = factorized(df, by)
+    keep = (values >= 0) & (groups >= 0)
+    # One integer per (group, value) pair; distinct pairs are counted per group.
+    pairs = np.unique(groups[keep].astype(np.int64) * len(uniques) + values[keep])
+    counts = np.bincount(pairs // max(len(uniques), 1), minlength=len(labels))
+    return pd.Series(counts, index=labels, name=column).sort_index()
+
+
+# ============================================================
+# 🎲 HyperLogLog Sketches
+# ============================================================
+
+def hll_registers(hashes, groups=None, n_groups=1, precision=HLL_PRECISION):
+    """
+    HyperLogLog registers (n_groups x 2 ** precision, uint8) of 64-bit
+    hashes, one row per group code (rows with code -1 are skipped).
+    """
+    m = 1 << precision
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    groups = np.zeros(len(hashes), dtype=np.intp) if groups is None else np.asarray(groups)
+    keep = groups >= 0
+    hashes, groups = hashes[keep], groups[keep]
+
+    index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+    rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+    # Rank = position of the leading one bit in the remaining bits; exact in
+    # float64 since they fit in its 53-bit mantissa.
+    _, exponent = np.frexp(rest.astype(np.float64))
+    rank = np.where(rest > 0, 64 - precision - exponent + 1, 64 - precision + 1).astype(np.uint8)
+
+    registers = np.zeros(n_groups * m, dtype=np.uint8)
+    np.maximum.at(registers, groups * m + index, rank)
+    return registers.reshape(n_groups, m)
+
+
+def _sigma(x):
+    if x == 1.0:
+        return np.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y *= 2
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    if x in (0.0, 1.0):
+        return 0.0
+    y, z = 1.0, 1.0 - x
+    while True:
+        x = np.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def hll_estimate(registers):
+    """
+    Estimated distinct count per register row, using Ertl's improved
+    estimator (unbiased across the range without empirical bias tables).
+    """
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    q = 64 - int(np.log2(m))
+    estimates = np.empty(len(registers))
+    for i, row in enumerate(registers):
+        counts = np.bincount(row, minlength=q + 2)
+        z = m * _tau(1 - counts[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + counts[k])
+        z += m * _sigma(counts[0] / m)
+        estimates[i] = m * m / (2 * np.log(2) * z)
+    return estimates
+
+
+def build_sketch(df, column, by=None, precision=HLL_PRECISION):
+    """
+    Mergeable sketch of column's distinct values per `by` group: a dict of
+    group labels and their register rows. Values are hashed, not coded, so
+    sketches of different chunks or batches combine with merge_sketches().
+    """
+    values, uniques = factorized(df, column)
+    # Hash each distinct value once, then spread the hashes over the rows.
+    hashes = pd.util.hash_pandas_object(pd.Series(uniques), index=False).to_numpy()
+    groups, labels = group_codes(df, by)
+    present = values >= 0
+    return {
+        "labels": pd.Index(labels),
+        "registers": hll_registers(
+            hashes[values[present]], np.asarray(groups)[present], len(labels), precision
+        ),
+    }
+
+
+def merge_sketches(a, b):
+    """Union of two sketches (register-wise maximum, groups aligned by label)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    labels = a["labels"].union(b["labels"])
+    registers = np.zeros((len(labels), a["registers"].shape[1]), dtype=np.uint8)
+    for sketch in (a, b):
+        rows = labels.get_indexer(sketch["labels"])
+        registers[rows] = np.maximum(registers[rows], sketch["registers"])
+    return {"labels": labels, "registers": registers}
+
+
+def sketch(df, column, by=None):
+    """Sketch of column per `by` group, built once per dataset version."""
+    return memoized(df, ("hll", column, by), lambda: build_sketch(df, column, by))
+
+
+def sketch_counts(sk):
+    """Estimated distinct counts of a sketch, indexed by group label."""
+    counts = np.rint(hll_estimate(sk["registers"])).astype(np.int64)
+    return pd.Series(counts, index=sk["labels"]).sort_index()
+
+
+# ============================================================
+# 🧮 Distinct Counts
+# ============================================================
+
+def distinct_count(df, column, by=None, mode="exact"):
+    """
+    Number of distinct values of column, overall (by=None, an int) or per
+    `by` group (a Series). mode "exact" counts factorized codes; "hll"
+    estimates from mergeable HyperLogLog sketches.
+    """
+    if mode not in DISTINCT_MODES:
+        raise ValueError(f"Unknown distinct mode: {mode}")
+    if mode == "hll":
+        counts = sketch_counts(sketch(df, column, by))
+        return int(counts.iloc[0]) if by is None else counts
+    if by is None:
+        return memoized(df, ("distinct", column), lambda: _exact(df, column, None))
+    return memoized(df, ("distinct", column, by), lambda: _exact(df, column, by))
@@ -0,0 +1,141 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.aggregate import dataset_version, memoized, stamp_version
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+FILTER_DIMENSIONS = ["Category", "Region", "Segment", "State", "Ship Mode"]
+DATE_COLUMN = "Order Date"
+
+# Filtered views kept so revisiting a filter state reuses its aggregates.
+MAX_VIEWS = 16
+
+
+# ============================================================
+# 🗂️ Filter Index
+# ============================================================
+
+def build_index(df):
+    """
+    Integer codes per filter dimension and day numbers for the date range,
+    so filters resolve with array lookups instead of string comparisons.
+    """
+    index = {"codes": {}, "days": None, "date_bounds": None}
+    for dim in FILTER_DIMENSIONS:
+        if dim in df.columns:
+            codes, uniques = pd.factorize(df[dim], sort=True)
+            index["codes"][dim] = (codes, pd.Index(uniques))
+    if DATE_COLUMN in df.columns:
+        days = df[DATE_COLUMN].to_numpy().astype("datetime64[D]")
+        index["days"] = days.astype(np.int64)
+        if len(days):
+            index["date_bounds"] = (days.min().astype(object), days.max().astype(object))
+    return index
+
+
+def get_index(df):
+    """Filter index for df, built once per dataset version."""
+    return memoized(df, ("filter_index",), lambda: build_index(df))
+
+
+def filter_mask(index, selections, date_range=None):
+    """
+    Boolean row mask for the selections ({dimension: values}) and an optional
+    inclusive (start, end) date range. Returns None when nothing is filtered.
+    """
+    mask = None
+    for dim, values in selections.items():
+        if not values or dim not in index["codes"]:
+            continue
+        codes, uniques = index["codes"][dim]
+        # One extra False slot so missing values (code -1) never match.
+        allowed = np.zeros(len(uniques) + 1, dtype=bool)
+        positions = uniques.get_indexer(list(values))
+        allowed[positions[positions >= 0]] = True
+        dim_mask = allowed[codes]
+        mask = dim_mask if mask is None else mask & dim_mask
+
+    if date_range is not None and index["days"] is not None:
+        start, end = (np.datetime64(d, "D").astype(np.int64) for d in date_range)
+        days = index["days"]
+        date_mask = (days >= start) & (days <= end)
+        mask = date_mask if mask is None else mask & date_mask
+    return mask
+
+
+def filter_key(selections, date_range=None):
+    """Stable identifier of a filter state."""
+    parts = sorted(
+        (dim, tuple(sorted(map(str, values))))
+        for dim, values in selections.items() if values
+    )
+    text = repr((parts, tuple(map(str, date_range or ()))))
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+# ============================================================
+# 🔎 Filtered Views
+# ============================================================
+
+_views = OrderedDict()
+_views_lock = threading.Lock()
+
+
+def apply_filters(df, selections, date_range=None):
+    """
+    Rows of df matching the filters. The unfiltered frame is returned as is;
+    filtered views are versioned and reused for the same filter state.
+    """
+    parent = dataset_version(df)
+    mask = filter_mask(get_index(df), selections, date_range)
+    if mask is None:
+        return df
+
+    key = (parent, filter_key(selections, date_range))
+    if parent is not None:
+        with _views_lock:
+            view = _views.get(key)
+            if view is not None:
+                _views.move_to_end(key)
+                return view
+
+    view = df.take(np.flatnonzero(mask))
+    if parent is None:
+        return view
+
+    stamp_version(view, f"{parent}|{key[1]}")
+    with _views_lock:
+        _views[key] = view
+        while len(_views) > MAX_VIEWS:
+            _views.popitem(last=False)
+    return view
+
+
+def filter_sidebar(df):
+    """Sidebar filter widgets; returns the filtered view of df."""
+    index = get_index(df)
+    selections, date_range = {}, None
+
+    with st.sidebar.expander("🔎 Filters", expanded=False):
+        for dim, (_, uniques) in index["codes"].items():
+            selections[dim] = st.multiselect(dim, list(uniques), placeholder="All")
+
+        if index["date_bounds"] is not None:
+            first, last = index["date_bounds"]
+            picked = st.date_input(
+                "Order Date range", value=(first, last),
+                min_value=first, max_value=last,
+            )
+            # The widget returns a single date while a range is being picked.
+            if isinstance(picked, (tuple, list)) and len(picked) == 2 and tuple(picked) != (first, last):
+                date_range = tuple(picked)
+
+    return apply_filters(df, selections, date_range)
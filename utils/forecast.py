@@ -0,0 +1,226 @@
+import logging
+import threading
+import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import memoized
+from utils.timeseries import timeseries
+
+try:
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    HAS_STATSMODELS = True
+except ImportError:
+    HAS_STATSMODELS = False
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+FORECAST_GROUPS = ["Category", "Region"]
+FORECAST_MEASURE = "Sales"
+DEFAULT_HORIZON = 6
+
+# Monthly series; seasonality is only fitted with two full years of data,
+# a trend with at least MIN_TREND_POINTS months. Shorter series repeat
+# their last value.
+SEASONAL_PERIODS = 12
+MIN_TREND_POINTS = 4
+
+# Models are fitted in background threads so a script run never waits.
+FORECAST_WORKERS = 2
+
+# How often the dashboard checks for finished models while any are fitting.
+FORECAST_POLL_SECONDS = 1.0
+
+# A series extended by at most this many periods since its last full fit
+# is refit from the previous parameters (no grid search); longer
+# extensions get a full fit, so warm starts never drift far.
+MAX_WARM_PERIODS = 3
+
+# Recent fits kept per (measure, grouping, group) for reuse and warm starts.
+FIT_HISTORY = 4
+
+
+# ============================================================
+# 📐 Model Fitting (runs in worker threads)
+# ============================================================
+
+def model_spec(n_points):
+    """Holt-Winters options for a series of n_points, or None for a naive forecast."""
+    if n_points >= 2 * SEASONAL_PERIODS:
+        return {"trend": "add", "seasonal": "add", "seasonal_periods": SEASONAL_PERIODS}
+    if n_points >= MIN_TREND_POINTS:
+        return {"trend": "add", "seasonal": None, "seasonal_periods": None}
+    return None
+
+
+def _start_params(params, spec):
+    # Parameter order documented for ExponentialSmoothing.fit(start_params=...).
+    values = [params["smoothing_level"]]
+    if spec["trend"]:
+        values.append(params["smoothing_trend"])
+    if spec["seasonal"]:
+        values.append(params["smoothing_seasonal"])
+    values.append(params["initial_level"])
+    if spec["trend"]:
+        values.append(params["initial_trend"])
+    if spec["seasonal"]:
+        values.extend(params["initial_seasons"])
+    return np.asarray(values, dtype="float64")
+
+
+def fit_series(values, warm=None):
+    """
+    Fit a model to a monthly series. warm: an earlier fit of a prefix of
+    values with the same spec, whose parameters start the optimizer.
+    Returns a fit dict; forecast it with forecast_fit().
+    """
+    values = np.asarray(values, dtype="float64")
+    spec = model_spec(len(values)) if HAS_STATSMODELS else None
+    fit = {"values": values, "spec": spec, "result": None, "cold_points": len(values)}
+    if spec is None:
+        return fit
+
+    model = ExponentialSmoothing(values, initialization_method="estimated", **spec)
+    with warnings.catch_warnings():
+        # Convergence warnings on short or flat series are expected.
+        warnings.simplefilter("ignore")
+        if warm is not None:
+            fit["result"] = model.fit(start_params=_start_params(warm["result"].params, spec), use_brute=False)
+            fit["cold_points"] = warm["cold_points"]
+        else:
+            fit["result"] = model.fit()
+    return fit
+
+
+def forecast_fit(fit, horizon):
+    """Next horizon values of a fitted series."""
+    if fit["result"] is None:
+        last = fit["values"][-1] if len(fit["values"]) else np.nan
+        return np.full(horizon, last)
+    return np.asarray(fit["result"].forecast(horizon))
+
+
+# ============================================================
+# 🗃️ Fit Store & Worker Pool
+# ============================================================
+
+_fits = {}
+_fits_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Shared forecasting thread pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=FORECAST_WORKERS, thread_name_prefix="forecast")
+        return _pool
+
+
+def _reusable(fits, values):
+    """A stored fit of exactly values, or one whose series values extend."""
+    spec = model_spec(len(values)) if HAS_STATSMODELS else None
+    for fit in reversed(fits):
+        old = fit["values"]
+        if len(old) == len(values) and np.array_equal(old, values):
+            return fit, True
+        # The last stored period may have been partial; earlier ones must match.
+        if (
+            fit["result"] is not None and fit["spec"] == spec
+            and len(old) < len(values) <= fit["cold_points"] + MAX_WARM_PERIODS
+            and np.allclose(old[:-1], values[:len(old) - 1])
+        ):
+            return fit, False
+    return None, False
+
+
+def _fit_group(key, values, horizon):
+    with _fits_lock:
+        previous, exact = _reusable(_fits.get(key, ()), values)
+    if exact:
+        fit = previous
+    else:
+        fit = fit_series(values, warm=previous)
+        with _fits_lock:
+            _fits.setdefault(key, deque(maxlen=FIT_HISTORY)).append(fit)
+    return forecast_fit(fit, horizon)
+
+
+def clear_fits():
+    """Forget every stored fit (the next forecasts are fitted from scratch)."""
+    with _fits_lock:
+        _fits.clear()
+
+
+# ============================================================
+# 🔮 Forecasts
+# ============================================================
+
+def group_series(df, by=None, measure=FORECAST_MEASURE):
+    """Monthly measure totals per `by` group, with missing months as zero."""
+    trend = timeseries(df, "M", [by] if by else [])[measure]
+    groups = [("All", trend)] if by is None else [
+        (group, values.droplevel(by))
+        for group, values in trend.groupby(level=by, observed=True, sort=True)
+    ]
+    series = OrderedDict()
+    for group, values in groups:
+        months = pd.period_range(values.index.min(), values.index.max(), freq="M", name="Order Date")
+        series[group] = values.reindex(months, fill_value=0)
+    return series
+
+
+def submit_forecasts(df, by=None, horizon=DEFAULT_HORIZON, measure=FORECAST_MEASURE):
+    """
+    Start fitting every `by` group's series in the background, once per
+    dataset version and horizon. Returns {group: (history, Future)}; each
+    future resolves to the next horizon values.
+    """
+    def submit():
+        pool = get_pool()
+        return OrderedDict(
+            (group, (history, pool.submit(_fit_group, (measure, by, group), history.to_numpy("float64"), horizon)))
+            for group, history in group_series(df, by, measure).items()
+        )
+
+    return memoized(df, ("forecast", measure, by, horizon), submit)
+
+
+def collect_forecasts(jobs, by=None, measure=FORECAST_MEASURE):
+    """
+    Long frame of history and finished forecasts (Kind "Actual" or
+    "Forecast") and the number of groups still fitting.
+    """
+    label = by or "Group"
+    frames, pending = [], 0
+    for group, (history, future) in jobs.items():
+        if not future.done():
+            pending += 1
+            continue
+        try:
+            predicted = future.result()
+        except Exception as e:
+            logger.warning("forecast for %s failed: %s", group, e)
+            continue
+        months = pd.period_range(history.index[-1] + 1, periods=len(predicted), freq="M", name="Order Date")
+        frames.append(pd.DataFrame({
+            label: group, "Order Date": history.index, measure: history.to_numpy(), "Kind": "Actual",
+        }))
+        frames.append(pd.DataFrame({
+            label: group, "Order Date": months, measure: predicted, "Kind": "Forecast",
+        }))
+    if not frames:
+        return pd.DataFrame(columns=[label, "Order Date", measure, "Kind"]), pending
+    frame = pd.concat(frames, ignore_index=True)
+    frame["Order Date"] = frame["Order Date"].dt.to_timestamp()
+    return frame, pending
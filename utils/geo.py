@@ -0,0 +1,318 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import memoized
+from utils.cube import rollup
+from utils.distinct import factorized
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+COUNTRY_COLUMN = "Country"
+STATE_COLUMN = "State"
+CITY_COLUMN = "City"
+POSTAL_COLUMN = "Postal Code"
+
+# Datasets without a Country column are taken to be from this country.
+DEFAULT_COUNTRY = "USA"
+
+GEO_MEASURES = ["Sales", "Profit"]
+
+# (name, ISO 3166-1 alpha-2, alpha-3). Names and both codes resolve.
+COUNTRIES = [
+    ("United States", "US", "USA"), ("Canada", "CA", "CAN"), ("Mexico", "MX", "MEX"),
+    ("United Kingdom", "GB", "GBR"), ("Ireland", "IE", "IRL"), ("France", "FR", "FRA"),
+    ("Germany", "DE", "DEU"), ("Spain", "ES", "ESP"), ("Portugal", "PT", "PRT"),
+    ("Italy", "IT", "ITA"), ("Netherlands", "NL", "NLD"), ("Belgium", "BE", "BEL"),
+    ("Switzerland", "CH", "CHE"), ("Austria", "AT", "AUT"), ("Sweden", "SE", "SWE"),
+    ("Norway", "NO", "NOR"), ("Denmark", "DK", "DNK"), ("Finland", "FI", "FIN"),
+    ("Poland", "PL", "POL"), ("Czech Republic", "CZ", "CZE"), ("Hungary", "HU", "HUN"),
+    ("Romania", "RO", "ROU"), ("Greece", "GR", "GRC"), ("Turkey", "TR", "TUR"),
+    ("Russia", "RU", "RUS"), ("Ukraine", "UA", "UKR"), ("Israel", "IL", "ISR"),
+    ("Saudi Arabia", "SA", "SAU"), ("United Arab Emirates", "AE", "ARE"), ("Egypt", "EG", "EGY"),
+    ("Morocco", "MA", "MAR"), ("Nigeria", "NG", "NGA"), ("Kenya", "KE", "KEN"),
+    ("South Africa", "ZA", "ZAF"), ("India", "IN", "IND"), ("Pakistan", "PK", "PAK"),
+    ("Bangladesh", "BD", "BGD"), ("China", "CN", "CHN"), ("Japan", "JP", "JPN"),
+    ("South Korea", "KR", "KOR"), ("Taiwan", "TW", "TWN"), ("Vietnam", "VN", "VNM"),
+    ("Thailand", "TH", "THA"), ("Malaysia", "MY", "MYS"), ("Singapore", "SG", "SGP"),
+    ("Indonesia", "ID", "IDN"), ("Philippines", "PH", "PHL"), ("Australia", "AU", "AUS"),
+    ("New Zealand", "NZ", "NZL"), ("Brazil", "BR", "BRA"), ("Argentina", "AR", "ARG"),
+    ("Chile", "CL", "CHL"), ("Colombia", "CO", "COL"), ("Peru", "PE", "PER"),
+]
+
+COUNTRY_ALIASES = {
+    "United States of America": "USA", "U.S.": "USA", "U.S.A.": "USA",
+    "Great Britain": "GBR", "England": "GBR", "UK": "GBR",
+    "Korea": "KOR", "Republic of Korea": "KOR", "Czechia": "CZE",
+    "Russian Federation": "RUS", "UAE": "ARE", "Viet Nam": "VNM",
+}
+
+# First-level subdivisions: name -> code. Codes resolve to themselves.
+SUBDIVISIONS = {
+    "USA": {
+        "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR",
+        "California": "CA", "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE",
+        "District of Columbia": "DC", "Florida": "FL", "Georgia": "GA", "Hawaii": "HI",
+        "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA", "Kansas": "KS",
+        "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME", "Maryland": "MD",
+        "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS",
+        "Missouri": "MO", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV",
+        "New Hampshire": "NH", "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY",
+        "North Carolina": "NC", "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK",
+        "Oregon": "OR", "Pennsylvania": "PA", "Rhode Island": "RI", "South Carolina": "SC",
+        "South Dakota": "SD", "Tennessee": "TN", "Texas": "TX", "Utah": "UT",
+        "Vermont": "VT", "Virginia": "VA", "Washington": "WA", "West Virginia": "WV",
+        "Wisconsin": "WI", "Wyoming": "WY",
+    },
+    "CAN": {
+        "Alberta": "AB", "British Columbia": "BC", "Manitoba": "MB", "New Brunswick": "NB",
+        "Newfoundland and Labrador": "NL", "Northwest Territories": "NT", "Nova Scotia": "NS",
+        "Nunavut": "NU", "Ontario": "ON", "Prince Edward Island": "PE", "Quebec": "QC",
+        "Saskatchewan": "SK", "Yukon": "YT",
+    },
+}
+SUBDIVISION_ALIASES = {"USA": {"Washington DC": "DC", "Washington, D.C.": "DC"}, "CAN": {"Québec": "QC"}}
+
+# Postal code shape per country: (digits to zero-pad numeric codes to, pattern).
+POSTAL_FORMATS = {
+    "USA": (5, r"\d{5}(-\d{4})?"),
+    "CAN": (None, r"[A-Z]\d[A-Z] ?\d[A-Z]\d"),
+}
+
+
+# ============================================================
+# 🧭 Lookup Index (built once at import)
+# ============================================================
+
+def _normalize(values):
+    """Trimmed, case-folded text of each value (missing stays missing)."""
+    values = pd.Series(values, dtype=object)
+    return values.where(values.isna(), values.astype(str).str.strip().str.casefold())
+
+
+def _build_country_index():
+    index = {}
+    for name, iso2, iso3 in COUNTRIES:
+        for key in (name, iso2, iso3):
+            index[key.casefold()] = iso3
+    index.update({alias.casefold(): iso3 for alias, iso3 in COUNTRY_ALIASES.items()})
+    return pd.Series(index)
+
+
+def _build_state_index():
+    index = {}
+    for country, names in SUBDIVISIONS.items():
+        for name, code in {**names, **SUBDIVISION_ALIASES.get(country, {})}.items():
+            index[f"{country}|{name.casefold()}"] = code
+            index[f"{country}|{code.casefold()}"] = code
+    return pd.Series(index)
+
+
+COUNTRY_INDEX = _build_country_index()
+STATE_INDEX = _build_state_index()
+
+
+def country_codes(values):
+    """ISO-3 code of each country name or code (NaN when unknown)."""
+    return _normalize(values).map(COUNTRY_INDEX).to_numpy(dtype=object)
+
+
+def state_codes(countries, states):
+    """Subdivision code of each (ISO-3 country, state name or code) pair (NaN when unknown)."""
+    keys = pd.Series(countries, dtype=object) + "|" + _normalize(states)
+    return keys.map(STATE_INDEX).to_numpy(dtype=object)
+
+
+def _postal_text(values):
+    # Numeric columns lose leading zeros (and are floats when codes are missing).
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        present = values.notna()
+        text = pd.Series(np.nan, index=values.index, dtype=object)
+        text[present] = values[present].astype("int64").astype(str)
+        return text, present
+    values = values.astype(object)
+    numeric = values.map(lambda v: isinstance(v, (int, float, np.integer, np.floating)) and v == v)
+    text = values.where(values.isna(), values.astype(str).str.strip().str.upper())
+    text[numeric] = values[numeric].map(lambda v: str(int(v)))
+    return text, numeric
+
+
+def normalize_postal(values, country=DEFAULT_COUNTRY):
+    """
+    Canonical postal code text for one country's codes (numeric codes zero-padded);
+    NaN where a value doesn't have the country's postal code shape.
+    """
+    text, numeric = _postal_text(values)
+    width, pattern = POSTAL_FORMATS.get(country, (None, r".+"))
+    if width is not None:
+        text[numeric] = text[numeric].str.zfill(width)
+    valid = text.str.fullmatch(pattern).fillna(False).astype(bool)
+    return text.where(valid).to_numpy(dtype=object)
+
+
+# ============================================================
+# 🗺️ Geo Rollups
+# ============================================================
+
+def _single_country(df):
+    # The one ISO-3 country of df, or None when it holds several (or unknown ones).
+    if COUNTRY_COLUMN not in df.columns:
+        return DEFAULT_COUNTRY
+    _, uniques = factorized(df, COUNTRY_COLUMN)
+    codes = set(country_codes(uniques))
+    return codes.pop() if len(codes) == 1 else None
+
+
+def _code_rollup(df, keys):
+    """
+    Sums of GEO_MEASURES per combination of keys, grouped on the factorized
+    codes of each key (rows with a missing key are left out) and sorted by
+    keys. Returns the frame (keys as categoricals) and, per key, each output
+    row's code into the key's distinct values.
+    """
+    combined = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    uniques = {}
+    for key in keys:
+        codes, uniques[key] = factorized(df, key)
+        uniques[key] = np.asarray(uniques[key], dtype=object)
+        valid &= codes >= 0
+        combined = combined * max(len(uniques[key]), 1) + codes
+    groups, inverse = np.unique(combined[valid], return_inverse=True)
+
+    codes = {}
+    for key in reversed(keys):
+        groups, codes[key] = np.divmod(groups, max(len(uniques[key]), 1))
+    # Order the groups by label: rank each key's distinct values once.
+    ranks = {key: np.argsort(np.argsort(uniques[key].astype(str))) for key in keys}
+    order = np.lexsort([ranks[key][codes[key]] for key in reversed(keys)])
+    codes = {key: codes[key][order] for key in keys}
+
+    frame = pd.DataFrame({
+        key: pd.Categorical.from_codes(codes[key], categories=uniques[key]) for key in keys
+    })
+    for measure in GEO_MEASURES:
+        values = np.nan_to_num(df[measure].to_numpy(dtype="float64", na_value=np.nan)[valid])
+        frame[measure] = np.bincount(inverse, weights=values, minlength=len(order))[order]
+    return frame, codes, uniques
+
+
+def _coded(frame, codes, uniques):
+    # Country and state codes for a rollup, resolved once per distinct value
+    # (or country/state pair) and spread over its rows.
+    if COUNTRY_COLUMN in codes:
+        countries = country_codes(uniques[COUNTRY_COLUMN])[codes[COUNTRY_COLUMN]]
+        frame.insert(frame.columns.get_loc(COUNTRY_COLUMN) + 1, "Country Code", countries)
+        country_idx = codes[COUNTRY_COLUMN]
+    else:
+        frame.insert(0, "Country Code", DEFAULT_COUNTRY)
+        countries = np.full(len(frame), DEFAULT_COUNTRY, dtype=object)
+        country_idx = np.zeros(len(frame), dtype=np.int64)
+    if STATE_COLUMN in codes:
+        n_states = max(len(uniques[STATE_COLUMN]), 1)
+        pairs, first, inverse = np.unique(
+            country_idx * n_states + codes[STATE_COLUMN], return_index=True, return_inverse=True
+        )
+        resolved = state_codes(countries[first], uniques[STATE_COLUMN][pairs % n_states])
+        frame.insert(frame.columns.get_loc(STATE_COLUMN) + 1, "State Code", resolved[inverse])
+    return frame
+
+
+def country_rollup(df):
+    """Sales and profit per country with its ISO-3 code (NaN when unknown)."""
+    def compute():
+        if COUNTRY_COLUMN not in df.columns:
+            totals = df[GEO_MEASURES].sum()
+            return pd.DataFrame({
+                COUNTRY_COLUMN: [DEFAULT_COUNTRY], "Country Code": [DEFAULT_COUNTRY],
+                **{measure: [totals[measure]] for measure in GEO_MEASURES},
+            })
+        return _coded(*_code_rollup(df, [COUNTRY_COLUMN]))
+
+    return memoized(df, ("geo", "country"), compute)
+
+
+def state_rollup(df):
+    """
+    Sales and profit per state with its country and subdivision codes (NaN
+    when unknown). Single-country datasets roll up from the shared cube.
+    """
+    def compute():
+        country = _single_country(df)
+        if country is None:
+            return _coded(*_code_rollup(df, [COUNTRY_COLUMN, STATE_COLUMN]))
+        frame = rollup(df, STATE_COLUMN)[GEO_MEASURES].reset_index()
+        frame.insert(0, "Country Code", country)
+        frame.insert(2, "State Code", state_codes(frame["Country Code"], frame[STATE_COLUMN]))
+        return frame
+
+    return memoized(df, ("geo", "state"), compute)
+
+
+def city_rollup(df):
+    """Sales and profit per city (within its state and country), with their codes."""
+    def compute():
+        keys = [col for col in (COUNTRY_COLUMN, STATE_COLUMN, CITY_COLUMN) if col in df.columns]
+        return _coded(*_code_rollup(df, keys))
+
+    return memoized(df, ("geo", "city"), compute)
+
+
+def postal_codes(df):
+    """Canonical postal code per row (NaN where missing or malformed), once per version."""
+    def compute():
+        codes, uniques = factorized(df, POSTAL_COLUMN)
+        country = _single_country(df)
+        if country is not None:
+            # Normalize the distinct codes, then spread them over the rows.
+            canonical = np.append(normalize_postal(uniques, country), np.nan)
+            return pd.Categorical(canonical[codes])
+
+        # Several countries: normalize each distinct (country, code) pair.
+        country_idx, countries = factorized(df, COUNTRY_COLUMN)
+        isos = np.append(country_codes(countries), np.nan)
+        width = len(uniques) + 1
+        pairs, inverse = np.unique((country_idx.astype(np.int64) + 1) * width + codes + 1, return_inverse=True)
+        pair_iso = isos[pairs // width - 1]
+        pair_postal = np.append(np.asarray(uniques, dtype=object), np.nan)[pairs % width - 1]
+        canonical = np.full(len(pairs), np.nan, dtype=object)
+        # Codes of unknown countries (reported with the country) are kept as given.
+        unknown = pd.isna(pair_iso)
+        canonical[unknown] = normalize_postal(pair_postal[unknown], None)
+        for iso in pd.unique(pair_iso[~unknown]):
+            mask = pair_iso == iso
+            canonical[mask] = normalize_postal(pair_postal[mask], iso)
+        return pd.Categorical(canonical[inverse])
+
+    return memoized(df, ("geo", "postal"), compute)
+
+
+def unmatched_locations(df):
+    """
+    Countries, states and postal codes that could not be resolved, with the
+    sales they carry, largest first. Nothing is dropped silently.
+    """
+    def compute():
+        parts = []
+        countries = country_rollup(df)
+        missing = countries[countries["Country Code"].isna()]
+        parts.append(pd.DataFrame({"Field": COUNTRY_COLUMN, "Value": missing[COUNTRY_COLUMN].astype(str),
+                                   "Sales": missing["Sales"]}))
+        if STATE_COLUMN in df.columns:
+            states = state_rollup(df)
+            # States of unknown countries are already reported with their country.
+            missing = states[states["State Code"].isna() & states["Country Code"].isin(list(SUBDIVISIONS))]
+            parts.append(pd.DataFrame({"Field": STATE_COLUMN, "Value": missing[STATE_COLUMN].astype(str),
+                                       "Sales": missing["Sales"]}))
+        if POSTAL_COLUMN in df.columns:
+            present = df[POSTAL_COLUMN].notna().to_numpy()
+            bad = present & pd.isna(np.asarray(postal_codes(df), dtype=object))
+            if bad.any():
+                sales = df.loc[bad, "Sales"].groupby(df.loc[bad, POSTAL_COLUMN].astype(str), observed=True).sum()
+                parts.append(pd.DataFrame({"Field": POSTAL_COLUMN, "Value": sales.index, "Sales": sales.to_numpy()}))
+        report = pd.concat(parts, ignore_index=True)
+        return report.sort_values("Sales", ascending=False, ignore_index=True)
+
+    return memoized(df, ("geo", "unmatched"), compute)
@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from utils import registry
+from utils.aggregate import dataset_version
+from utils.perf import start_run
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Steps of an upload job in order, with their progress labels. The first
+# two build the dataset; the rest warm the aggregates behind each part of
+# the dashboard, so it fills in as they finish.
+UPLOAD_STEPS = {
+    "read": "Reading CSV",
+    "clean": "Validating & cleaning",
+    "kpis": "Key metrics",
+    "overview": "Sales trends",
+    "category": "Category insights",
+    "regional": "Regional analysis",
+    "product": "Product performance",
+    "segment": "Segment analysis",
+    "correlation": "Correlations",
+    "outlier": "Outliers",
+    "logistics": "Logistics",
+    "forecast": "Forecast models",
+}
+
+# Upload jobs run in background threads so a script run never waits.
+JOB_WORKERS = 2
+
+# How often the sidebar checks a running job for progress.
+JOB_POLL_SECONDS = 0.5
+
+
+# ============================================================
+# 🧱 Precompute Steps (run in worker threads)
+# ============================================================
+
+def _precompute_steps():
+    # Imported here: utils.calculate builds on the loaders that use this module.
+    from utils import calculate as calc
+    from utils.parallel import precompute
+    from utils.timeseries import FREQUENCIES
+
+    def kpis(df):
+        # Large frames aggregate across cores first (no-op below PARALLEL_MIN_ROWS).
+        precompute(df)
+        calc.get_basic_kpis(df, "exact")
+        calc.get_profit_margin(df)
+
+    def overview(df):
+        calc.sales_trend(df, FREQUENCIES["Monthly"])
+        calc.best_selling_month(df)
+
+    def category(df):
+        calc.category_performance_by_month(df)
+        calc.discount_to_sales_ratio(df)
+        calc.profit_margin_by_category(df)
+
+    def regional(df):
+        calc.best_region(df)
+        calc.regional_summary(df)
+        calc.statewise_sales(df)
+        calc.country_sales(df)
+        if "City" in df.columns:
+            calc.city_sales(df)
+        calc.unmatched_geo(df)
+
+    def product(df):
+        calc.top_products(df)
+        calc.bottom_products(df)
+        calc.loss_drivers(df)
+
+    def segment(df):
+        if "Segment" in df.columns:
+            calc.segment_summary(df)
+            calc.best_segment(df)
+
+    def correlation(df):
+        calc.correlation_matrix(df, None, "pearson")
+
+    def outlier(df):
+        calc.detect_outliers(df, 2.5, by="Category", method="zscore")
+
+    def logistics(df):
+        calc.shipping_summary(df, None)
+        calc.late_shipment_rate(df)
+        if "Ship Mode" in df.columns:
+            calc.shipping_summary(df, "Ship Mode")
+            calc.lead_time_distribution(df, "Ship Mode")
+
+    def forecast(df):
+        # Only submits the fits; they finish in the forecast pool.
+        calc.sales_forecast(df)
+
+    return [
+        ("kpis", kpis), ("overview", overview), ("category", category),
+        ("regional", regional), ("product", product), ("segment", segment),
+        ("correlation", correlation), ("outlier", outlier),
+        ("logistics", logistics), ("forecast", forecast),
+    ]
+
+
+def _advance(job, step):
+    # Finish the current step and start the next; stop here if cancelled.
+    if job["cancel"].is_set():
+        raise CancelledError()
+    if job["step"] is not None:
+        job["done"].append(job["step"])
+    job["step"] = step
+
+
+def _run_upload(job, raw_bytes, compact):
+    # Imported here: utils.load submits these jobs.
+    from utils.load import read_cached
+
+    start_run()
+    problems = []
+    try:
+        df = read_cached(
+            raw_bytes, compact=compact,
+            progress=lambda step: _advance(job, step), report=problems.append,
+        )
+        if df is None:
+            job["status"], job["error"] = "invalid", " ".join(problems)
+            return
+        # The registry holds the frame (read_cached registered it), so its
+        # idle and size limits apply; the job only records that it exists.
+        job["parsed"] = True
+        for step, warm in _precompute_steps():
+            _advance(job, step)
+            warm(df)
+        _advance(job, None)
+        job["status"] = "done"
+    except CancelledError:
+        job["status"] = "cancelled"
+    except Exception as e:
+        logger.exception("upload job %s failed", job["key"])
+        job["status"], job["error"] = "failed", str(e)
+
+
+# ============================================================
+# 🗂️ Job Store & Worker Pool
+# ============================================================
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Shared upload-job thread pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="upload")
+        return _pool
+
+
+def _expire(now):
+    # Callers hold _jobs_lock. Sessions that stopped rerunning (closed
+    # tabs) lose their job after SESSION_TTL, as they lose registry holds.
+    for session_id in [sid for sid, job in _jobs.items() if now - job["last_seen"] > registry.SESSION_TTL]:
+        _cancel(_jobs.pop(session_id))
+
+
+def submit_upload(session_id, key, raw_bytes, compact=False):
+    """
+    The session's upload job for dataset `key`, started in the background
+    if it isn't running yet (or if its parsed frame has since left the
+    registry). A job for a different dataset is cancelled first (at its
+    next step; a CSV already being parsed is finished).
+    Returns the job dict: "status" (running, done, invalid, failed or
+    cancelled), "parsed" once the frame is registered (see job_frame),
+    finished steps in "done" and "error".
+    """
+    now = time.monotonic()
+    with _jobs_lock:
+        _expire(now)
+        job = _jobs.get(session_id)
+        if (
+            job is not None and job["key"] == key and job["status"] != "cancelled"
+            and not (job["parsed"] and registry.get(key) is None)
+        ):
+            job["last_seen"] = now
+            return job
+        if job is not None:
+            _cancel(job)
+        job = {
+            "key": key, "status": "running", "step": None, "done": [],
+            "parsed": False, "error": None, "cancel": threading.Event(),
+            "last_seen": now,
+        }
+        job["future"] = get_pool().submit(_run_upload, job, raw_bytes, compact)
+        _jobs[session_id] = job
+        return job
+
+
+def _cancel(job):
+    job["cancel"].set()
+    if job["future"].cancel():
+        job["status"] = "cancelled"
+
+
+def cancel_upload(session_id):
+    """Cancel and forget the session's upload job, if any."""
+    with _jobs_lock:
+        job = _jobs.pop(session_id, None)
+    if job is not None:
+        _cancel(job)
+
+
+def get_job(session_id):
+    """The session's current upload job, or None."""
+    now = time.monotonic()
+    with _jobs_lock:
+        _expire(now)
+        job = _jobs.get(session_id)
+        if job is not None:
+            job["last_seen"] = now
+        return job
+
+
+def job_frame(job):
+    """The job's parsed dataset, from the registry; None until parsed or once evicted."""
+    return registry.get(job["key"]) if job["parsed"] else None
+
+
+def step_ready(job, df, step=None):
+    """
+    True unless job is still warming step (or any step, when step is None)
+    for df's dataset. Other versions, such as filtered views, compute their
+    own results directly and are always ready.
+    """
+    if job is None or job["status"] != "running" or dataset_version(df) != job["key"]:
+        return True
+    return step is not None and step in job["done"]
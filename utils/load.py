@@ -1,5 +1,24 @@
+import hashlib
+import logging
+import os
+
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils import registry
+from utils.aggregate import stamp_version
+from utils.dialect import read_csv_bytes
+from utils.jobs import JOB_POLL_SECONDS, UPLOAD_STEPS, cancel_upload, get_job, job_frame, submit_upload
+from utils.perf import stage
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
 
 # ============================================================
 # ✅ Configuration
@@ -19,32 +38,173 @@ COLUMN_GROUPS = {
     "Logistic": ["Ship Mode"]
 }
 
+# Derived once at load time as compact integers, so calculations never
+# re-derive them per call (or write them into a shared frame).
+DERIVED_COLUMNS = ["Order Year", "Order Month", "Lead Time"]
+
+SAMPLE_PATH = "data/sample.csv"
+# None: detected from the file (see utils.dialect).
+SAMPLE_ENCODING = None
+
+# In compact mode, text columns with at most this share of distinct values
+# become categoricals; the rest become Arrow-backed strings.
+CATEGORY_MAX_RATIO = 0.5
+
+
+# ============================================================
+# 🗄️ Dataset Keys
+# ============================================================
+
+_path_keys = {}
+
+
+def dataset_key(raw_bytes, **options):
+    """Content hash of the raw file bytes plus the options used to clean them."""
+    digest = hashlib.blake2b(raw_bytes, digest_size=16)
+    for name in sorted(options):
+        digest.update(f"|{name}={options[name]!r}".encode())
+    return digest.hexdigest()
+
 
 # ============================================================
 # ⚙️ Utility Functions
 # ============================================================
 
-def preprocess(df):
-    """Clean and format dataframe."""
-    df["Order Date"] = pd.to_datetime(df["Order Date"], errors="coerce")
-    df["Ship Date"] = pd.to_datetime(df["Ship Date"], errors="coerce")
+def preprocess(df, compact=False, date_format=None):
+    """Clean and format dataframe. Dates parsed while reading are kept as they are."""
+    for col in ["Order Date", "Ship Date"]:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=date_format, errors="coerce")
     df = df.dropna(subset=["Order Date", "Sales", "Profit"])
+    df = add_derived_columns(df)
+    if compact:
+        df = compact_dtypes(df)
     return df
 
 
-def validate_columns(df):
+def add_derived_columns(df):
+    """Order year, order month (1-12) and ship lead time in days."""
+    order_date = df["Order Date"]
+    return df.assign(**{
+        "Order Year": order_date.dt.year.astype("int16"),
+        "Order Month": order_date.dt.month.astype("int8"),
+        # Missing ship dates stay missing; Int32 holds any span of datetimes.
+        "Lead Time": (df["Ship Date"] - order_date).dt.days.astype("Int32"),
+    })
+
+
+def _compact_column(series, n_rows):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series):
+        # Only narrow floats that survive the round trip, so sums stay exact.
+        narrow = series.astype("float32")
+        return narrow if narrow.astype(series.dtype).equals(series) else series
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        if series.nunique() <= CATEGORY_MAX_RATIO * n_rows:
+            return series.astype("category")
+        if HAS_PYARROW and getattr(series.dtype, "storage", None) != "pyarrow":
+            return series.astype(pd.StringDtype("pyarrow"))
+    return series
+
+
+def compact_dtypes(df):
+    """
+    Store low-cardinality text as categoricals, high-cardinality text as
+    Arrow strings and numbers in the narrowest lossless dtype.
+    Logs the memory saved per column.
+    """
+    n_rows = max(len(df), 1)
+    converted = {}
+    for col in df.columns:
+        series = df[col]
+        compact = _compact_column(series, n_rows)
+        if compact is series:
+            continue
+        before = series.memory_usage(deep=True, index=False)
+        after = compact.memory_usage(deep=True, index=False)
+        logger.info(
+            "compact %s: %s -> %s, %.1f KiB saved",
+            col, series.dtype, compact.dtype, (before - after) / 1024,
+        )
+        converted[col] = compact
+    return df.assign(**converted)
+
+
+def validate_columns(df, report=None):
+    """True if df has REQUIRED_COLUMNS; otherwise report (default: sidebar error) why."""
     missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing:
-        st.sidebar.error(f"❌ Missing required columns: {', '.join(missing)}")
+        (report or st.sidebar.error)(f"❌ Missing required columns: {', '.join(missing)}")
         return False
     return True
 
 
-def load_sample_data():
+def read_cached(raw_bytes, encoding=None, compact=False, progress=None, report=None):
+    """
+    Parse and preprocess CSV bytes, reusing the cleaned frame when the same
+    content was loaded before. The returned frame is shared: treat it as read-only.
+    Returns None if the file is missing required columns.
+    progress(step) is called as the "read" and "clean" steps start; report
+    receives validation errors (see validate_columns).
+    """
+    key = dataset_key(raw_bytes, encoding=encoding, compact=compact)
+    df = registry.get(key)
+    if df is not None:
+        return df
+
+    progress = progress or (lambda step: None)
+    progress("read")
+    with stage("read_csv") as record:
+        df, dialect = read_csv_bytes(raw_bytes, encoding)
+        record["rows_out"] = len(df)
+    progress("clean")
+    if not validate_columns(df, report):
+        return None
+    with stage("preprocess", rows_in=len(df)) as record:
+        df = preprocess(df, compact=compact, date_format=dialect["date_format"])
+        record["rows_out"] = len(df)
+    path = None
+    if HAS_PYARROW and df.memory_usage(deep=True).sum() >= registry.SPOOL_MIN_BYTES:
+        try:
+            df, path = registry.spool(key, df)
+        except OSError as e:
+            logger.warning("could not spool dataset %s: %s", key, e)
+    stamp_version(df, key)
+    return registry.put(key, df, path)
+
+
+def load_sample_data(compact=False):
     """Load built-in sample dataset."""
-    df = pd.read_csv("data/sample.csv", encoding="latin-1")
-    df = preprocess(df)
-    return df
+    if HAS_PYARROW:
+        # Imported here: utils.store builds on this module.
+        from utils.store import DASHBOARD_COLUMNS, load_converted
+        try:
+            return load_converted(
+                SAMPLE_PATH, encoding=SAMPLE_ENCODING, compact=compact,
+                columns=DASHBOARD_COLUMNS,
+            )
+        except OSError as e:
+            # e.g. a read-only deployment; fall back to parsing the CSV.
+            logger.warning("columnar copy of %s unavailable: %s", SAMPLE_PATH, e)
+
+    # Skip re-reading the file while it is unchanged on disk.
+    stat = os.stat(SAMPLE_PATH)
+    stamp = (SAMPLE_PATH, stat.st_mtime_ns, stat.st_size, compact)
+    key = _path_keys.get(stamp)
+    if key is not None:
+        df = registry.get(key)
+        if df is not None:
+            return df
+
+    with open(SAMPLE_PATH, "rb") as f:
+        raw_bytes = f.read()
+    _path_keys[stamp] = dataset_key(raw_bytes, encoding=SAMPLE_ENCODING, compact=compact)
+    return read_cached(raw_bytes, encoding=SAMPLE_ENCODING, compact=compact)
 
 
 # ============================================================
@@ -54,10 +214,12 @@ def load_sample_data():
 def dataset_audit(df):
     """Analyze what column groups are available and what's missing."""
     with st.sidebar.expander("Summary & Coverage", expanded=False):
+        # Frames read from a columnar file carry the coverage of the whole file.
+        columns = set(df.columns).union(*df.attrs.get("column_groups", {}).values())
         available, missing = {}, {}
         for group, cols in COLUMN_GROUPS.items():
-            present_cols = [c for c in cols if c in df.columns]
-            missing_cols = [c for c in cols if c not in df.columns]
+            present_cols = [c for c in cols if c in columns]
+            missing_cols = [c for c in cols if c not in columns]
             available[group] = present_cols
             missing[group] = missing_cols
 
@@ -102,6 +264,60 @@ def dataset_audit(df):
 # 📥 Main Loader
 # ============================================================
 
+def _session_id():
+    # Sessions hold registry datasets under their Streamlit session id.
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+
+def upload_job():
+    """This session's background upload job (see utils.jobs), or None."""
+    return get_job(_session_id())
+
+
+def upload_progress(job):
+    """
+    Sidebar progress of a running upload job. Polls every JOB_POLL_SECONDS
+    and reruns the page whenever a step finishes, so the dashboard fills in.
+    """
+    seen = len(job["done"]), job["status"]
+
+    def progress():
+        if (len(job["done"]), job["status"]) != seen:
+            st.rerun()
+        step = job["step"] or "read"
+        st.progress(
+            len(job["done"]) / len(UPLOAD_STEPS),
+            text=f"⏳ {UPLOAD_STEPS[step]} ({len(job['done']) + 1}/{len(UPLOAD_STEPS)})",
+        )
+
+    with st.sidebar:
+        st.fragment(progress, run_every=JOB_POLL_SECONDS)()
+
+
+def _load_upload(uploaded_file, compact):
+    # Parsing and precompute run in a background job; the page shows the
+    # dataset as soon as it is parsed and a new upload cancels the last job.
+    raw_bytes = uploaded_file.getvalue()
+    key = dataset_key(raw_bytes, encoding=None, compact=compact)
+    job = submit_upload(_session_id(), key, raw_bytes, compact)
+    if job["status"] == "running":
+        upload_progress(job)
+    if job["status"] == "invalid":
+        st.sidebar.error(job["error"])
+        st.sidebar.warning("⚠️ The uploaded file is not formatted properly.")
+        return None
+    if job["status"] == "failed" and not job["parsed"]:
+        st.sidebar.error(f"Error reading file: {job['error']}")
+        return None
+    df = job_frame(job)
+    if df is None:
+        return None
+    st.sidebar.success("✅ Data successfully loaded and validated.")
+    dataset_audit(df)
+    return registry.checkout(df, _session_id())
+
+
 def load_data():
     """Load dataset with choice between sample or custom CSV."""
     st.sidebar.header("📁 Data Configuration")
@@ -110,11 +326,19 @@ def load_data():
         ["Use Sample Data", "Upload Custom Data"],
         horizontal=True
     )
+    compact = st.sidebar.checkbox(
+        "Compact memory mode",
+        value=True,
+        help="Store text as categoricals/Arrow strings and downcast numbers.",
+    )
 
     if choice == "Use Sample Data":
-        df = load_sample_data()
+        st.session_state.pop("stream_summary", None)
+        cancel_upload(_session_id())
+        df = load_sample_data(compact=compact)
         if df is not None:
             dataset_audit(df)
+            df = registry.checkout(df, _session_id())
         return df
 
     else:
@@ -125,20 +349,31 @@ def load_data():
         `Sales`, `Profit`, `Discount`, `Quantity`  
         """)
         uploaded_file = st.sidebar.file_uploader("Upload your CSV", type=["csv"])
+        streaming = st.sidebar.checkbox(
+            "Streaming mode (very large files)",
+            value=False,
+            help="Aggregate the file in chunks instead of loading every row. "
+                 "Only the summary views are available.",
+        )
+        if not (uploaded_file and streaming):
+            st.session_state.pop("stream_summary", None)
+
+        if not uploaded_file or streaming:
+            registry.release(_session_id())
+            cancel_upload(_session_id())
 
-        if uploaded_file:
+        if uploaded_file and streaming:
+            # Imported here: utils.stream builds on this module.
+            from utils.stream import load_streaming
             try:
-                df = pd.read_csv(uploaded_file)
-                if not validate_columns(df):
-                    st.sidebar.warning("⚠️ The uploaded file is not formatted properly.")
-                    return None
-                df = preprocess(df)
-                st.sidebar.success("✅ Data successfully loaded and validated.")
-                dataset_audit(df)
-                return df
+                load_streaming(uploaded_file)
+                st.sidebar.success("✅ Data successfully streamed and aggregated.")
             except Exception as e:
                 st.sidebar.error(f"Error reading file: {e}")
-                return None
+            return None
+
+        elif uploaded_file:
+            return _load_upload(uploaded_file, compact)
         else:
             st.sidebar.info("📤 Upload a CSV to continue.")
             return None
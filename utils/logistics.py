@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import memoized
+from utils.distinct import group_codes
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Promised ship lead time in days per Ship Mode; a shipment leaving later
+# than its mode's target is late. Unknown modes use DEFAULT_TARGET_DAYS.
+SHIP_TARGET_DAYS = {
+    "Same Day": 0,
+    "First Class": 3,
+    "Second Class": 4,
+    "Standard Class": 6,
+}
+DEFAULT_TARGET_DAYS = 7
+
+LOGISTICS_GROUPS = ["Ship Mode", "Region", "Category"]
+
+# Lead-time percentiles reported per group.
+PERCENTILES = [0.5, 0.9, 0.95]
+
+# Histograms stop at this many days: longer lead times (usually a bad date)
+# are counted in the last day, so one bogus row can't widen every group's
+# histogram. Means still use the exact lead times.
+MAX_LEAD_DAYS = 365
+
+# Late-shipment rate above which a ship mode is flagged in recommendations.
+LATE_RATE_ALERT = 0.2
+
+
+# ============================================================
+# 🚚 Lead Times
+# ============================================================
+
+def lead_times(df):
+    """
+    Ship lead time in whole days per row as int32, -1 where the ship date is
+    missing or precedes the order date. Computed once per dataset version.
+    """
+    def compute():
+        if "Lead Time" in df.columns:
+            lead = df["Lead Time"]
+        else:
+            lead = (df["Ship Date"] - df["Order Date"]).dt.days
+        days = lead.to_numpy(dtype="float64", na_value=np.nan)
+        return np.where(np.isnan(days) | (days < 0), -1, days).astype(np.int32)
+
+    return memoized(df, ("lead_times",), compute)
+
+
+def target_days(df):
+    """Lead-time target in days per row, from its Ship Mode."""
+    def compute():
+        if "Ship Mode" not in df.columns:
+            return np.full(len(df), DEFAULT_TARGET_DAYS, dtype=np.int32)
+        codes, modes = group_codes(df, "Ship Mode")
+        # Trailing slot: rows with a missing mode (code -1) get the default.
+        per_mode = [SHIP_TARGET_DAYS.get(mode, DEFAULT_TARGET_DAYS) for mode in modes]
+        return np.array(per_mode + [DEFAULT_TARGET_DAYS], dtype=np.int32)[codes]
+
+    return memoized(df, ("target_days",), compute)
+
+
+def lead_time_histogram(df, by=None):
+    """
+    Shipments per lead-time day (up to MAX_LEAD_DAYS) per `by` group, built
+    with one bincount: a dict of group "labels", "counts" (groups x days),
+    total lead "days" and "late" counts. Percentiles are read off the
+    histogram, never by sorting.
+    """
+    def compute():
+        lead = lead_times(df)
+        groups, labels = group_codes(df, by)
+        keep = (lead >= 0) & (groups >= 0)
+        width = int(min(lead[keep].max(), MAX_LEAD_DAYS)) + 1 if keep.any() else 1
+        cells = groups[keep].astype(np.int64) * width + np.minimum(lead[keep], width - 1)
+        counts = np.bincount(cells, minlength=len(labels) * width)
+        late = keep & (lead > target_days(df))
+        return {
+            "labels": pd.Index(labels),
+            "counts": counts.reshape(len(labels), width),
+            "days": np.bincount(groups[keep], weights=lead[keep], minlength=len(labels)),
+            "late": np.bincount(groups[late], minlength=len(labels)),
+        }
+
+    return memoized(df, ("lead_histogram", by), compute)
+
+
+def histogram_percentiles(counts, percentiles=PERCENTILES):
+    """
+    Nearest-rank percentiles (in days) per histogram row from its cumulative
+    counts; NaN for empty rows.
+    """
+    cumulative = counts.cumsum(axis=1)
+    totals = cumulative[:, -1:]
+    result = {}
+    for q in percentiles:
+        rank = np.maximum(np.ceil(q * totals), 1)
+        days = (cumulative >= rank).argmax(axis=1).astype("float64")
+        result[q] = np.where(totals[:, 0] > 0, days, np.nan)
+    return result
+
+
+# ============================================================
+# 📋 Summaries
+# ============================================================
+
+def lead_time_summary(df, by=None, percentiles=PERCENTILES):
+    """
+    Shipments, mean lead days, lead-time percentiles and late-shipment rate
+    per `by` group (one "All" row when by is None), sorted by group.
+    """
+    hist = lead_time_histogram(df, by)
+    counts = hist["counts"]
+    shipments = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = hist["days"] / shipments
+        late_rate = hist["late"] / shipments
+
+    summary = pd.DataFrame({by or "Group": hist["labels"], "Shipments": shipments, "Mean Days": mean})
+    for q, days in histogram_percentiles(counts, percentiles).items():
+        summary[f"P{round(q * 100)}"] = days
+    summary["Late Rate"] = late_rate
+    return summary.sort_values(by or "Group").reset_index(drop=True)
+
+
+def lead_time_counts(df, by=None):
+    """Long frame of shipments per lead-time day (and `by` group) for plotting."""
+    hist = lead_time_histogram(df, by)
+    counts = hist["counts"]
+    frame = pd.DataFrame(counts, index=hist["labels"], columns=range(counts.shape[1]))
+    frame = frame.rename_axis(index=by or "Group", columns="Lead Days").stack().rename("Shipments")
+    frame = frame[frame > 0].reset_index()
+    return frame if by else frame.drop(columns="Group")
+
+
+def late_rate(df):
+    """Share of shipments with a known lead time that left after their target."""
+    hist = lead_time_histogram(df)
+    shipments = int(hist["counts"].sum())
+    return float(hist["late"].sum() / shipments) if shipments else float("nan")
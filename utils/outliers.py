@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import memoized
+from utils.cube import CUBE_DIMENSIONS, rollup
+from utils.distinct import group_codes
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Columns whose unusual values flag a row, and the columns summarized per product.
+SCORE_COLUMNS = ["Profit", "Discount"]
+SUMMARY_COLUMNS = ["Sales", "Profit", "Discount"]
+
+# Groups a row can be compared within (None compares with the whole dataset).
+OUTLIER_GROUPS = ["Category", "Sub-Category"]
+
+# Robust scales are rescaled to match a standard deviation for normal data,
+# so one threshold means the same thing for every method.
+MAD_TO_STD = 1.4826
+IQR_TO_STD = 1 / 1.349
+
+METHODS = ["zscore", "mad", "iqr"]
+
+
+# ============================================================
+# 🚨 Group-Aware Outlier Scores
+# ============================================================
+
+def _center_scale(df, by, method, col, values, codes, uniques):
+    # Center and scale per group, aligned with the group codes.
+    n_groups = len(uniques)
+    groups = pd.Series(values).groupby(codes)
+    if method == "zscore":
+        if by in CUBE_DIMENSIONS:
+            # Means and standard deviations straight from the rollup cube.
+            mean = rollup(df, by, "mean")[col].reindex(uniques).to_numpy()
+            std = rollup(df, by, "std")[col].reindex(uniques).to_numpy()
+            return mean, std
+        return (
+            groups.mean().reindex(range(n_groups)).to_numpy(),
+            groups.std().reindex(range(n_groups)).to_numpy(),
+        )
+    if method == "mad":
+        center = groups.median().reindex(range(n_groups)).to_numpy()
+        deviation = pd.Series(np.abs(values - _per_row(center, codes)))
+        mad = deviation.groupby(codes).median().reindex(range(n_groups)).to_numpy()
+        return center, MAD_TO_STD * mad
+    # "iqr": methods are checked against METHODS by outlier_scores.
+    quartiles = groups.quantile([0.25, 0.5, 0.75]).unstack().reindex(range(n_groups))
+    return quartiles[0.5].to_numpy(), IQR_TO_STD * (quartiles[0.75] - quartiles[0.25]).to_numpy()
+
+
+def _per_row(stat, codes):
+    # Trailing NaN slot so rows with a missing group (code -1) score NaN.
+    return np.append(stat, np.nan)[codes]
+
+
+def outlier_scores(df, by="Category", method="zscore"):
+    """
+    Largest absolute standardized deviation of SCORE_COLUMNS per row, with
+    center and scale taken within each `by` group (None for global).
+    Cached per dataset version as rows sorted by score, so any threshold
+    is answered with a binary search.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown outlier method: {method}")
+
+    def compute():
+        codes, uniques = group_codes(df, by)
+        score = np.full(len(df), -np.inf)
+        for col in SCORE_COLUMNS:
+            values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+            center, scale = _center_scale(df, by, method, col, values, codes, uniques)
+            scale = np.where(scale > 0, scale, np.nan)
+            z = np.abs(values - _per_row(center, codes)) / _per_row(scale, codes)
+            score = np.fmax(score, z)
+
+        valid = np.flatnonzero(np.isfinite(score))
+        order = valid[np.argsort(-score[valid], kind="stable")]
+        return {"order": order, "neg_sorted": -score[order]}
+
+    return memoized(df, ("outlier_scores", by, method), compute)
+
+
+def outlier_rows(df, threshold, by="Category", method="zscore"):
+    """Positions of rows scoring above threshold."""
+    scores = outlier_scores(df, by, method)
+    count = np.searchsorted(scores["neg_sorted"], -threshold, side="left")
+    return np.sort(scores["order"][:count])
+
+
+def outlier_summary(df, threshold, by="Category", method="zscore"):
+    """Mean Sales, Profit and Discount per product over its outlier rows."""
+    rows = outlier_rows(df, threshold, by, method)
+    # Gather only the flagged rows of the needed columns (no full-frame copy).
+    flagged = pd.DataFrame({
+        col: df[col].take(rows)
+        for col in ["Product Name", *SUMMARY_COLUMNS]
+    })
+    return (
+        flagged.groupby("Product Name", observed=True)[SUMMARY_COLUMNS]
+        .mean()
+        .sort_values("Profit", ascending=True)
+        .reset_index()
+    )
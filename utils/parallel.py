@@ -0,0 +1,206 @@
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import popen_spawn_posix, reduction, resource_tracker, spawn, util
+from multiprocessing.context import SpawnContext, SpawnProcess, set_spawning_popen
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregate import MEASURES, dataset_version, has_result, seed
+from utils.correlation import CORRELATION_GROUPS, build_moments
+from utils.cube import CUBE_DIMENSIONS, build_cube
+from utils.ranking import PRODUCT_COLUMN, build_product_table
+from utils.timeseries import TIMESERIES_DIMENSIONS, build_daily_store
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Below this many rows, shipping partitions to other processes costs more
+# than aggregating in place.
+PARALLEL_MIN_ROWS = 1_000_000
+
+PARTITION_MODES = ["order", "year"]
+
+# Worker processes; None means one per CPU.
+MAX_WORKERS = None
+
+
+# ============================================================
+# ⚡ Partition Partials (run in worker processes)
+# ============================================================
+
+def partial_aggregates(part, disjoint_orders):
+    """
+    Additive partial aggregates of one partition. Means are never averaged
+    across partitions: sums and counts travel instead. Distinct orders are
+    a count when partitions split on Order ID, the distinct values otherwise.
+    """
+    orders = part["Order ID"]
+    return {
+        "sums": part[MEASURES].sum(),
+        "counts": part[MEASURES].count(),
+        "orders": orders.nunique() if disjoint_orders else orders.dropna().unique(),
+        "cube": build_cube(part),
+        "products": build_product_table(part),
+        "daily": build_daily_store(part),
+        "moments": {
+            by: build_moments(part, by)
+            for by in [None, *CORRELATION_GROUPS] if by is None or by in part.columns
+        },
+    }
+
+
+# ============================================================
+# 🔀 Partitioning & Merge
+# ============================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class _WorkerPopen(popen_spawn_posix.Popen):
+    """
+    Spawn launcher whose children don't re-run the script that started the
+    server. Spawned children import __main__ from its __file__ or __spec__,
+    which under Streamlit is app.py: the whole dashboard would run again in
+    every worker. Workers only need utils, so this child's preparation data
+    leaves the main module out, as for a REPL. __main__ itself, which
+    Streamlit swaps on every rerun, is only read.
+    """
+
+    def _launch(self, process_obj):
+        # popen_spawn_posix.Popen._launch, with the main module left out.
+        tracker_fd = resource_tracker.getfd()
+        self._fds.append(tracker_fd)
+        prep_data = spawn.get_preparation_data(process_obj._name)
+        prep_data.pop("init_main_from_name", None)
+        prep_data.pop("init_main_from_path", None)
+        fp = io.BytesIO()
+        set_spawning_popen(self)
+        try:
+            reduction.dump(prep_data, fp)
+            reduction.dump(process_obj, fp)
+        finally:
+            set_spawning_popen(None)
+
+        parent_r = child_w = child_r = parent_w = None
+        try:
+            parent_r, child_w = os.pipe()
+            child_r, parent_w = os.pipe()
+            cmd = spawn.get_command_line(tracker_fd=tracker_fd, pipe_handle=child_r)
+            self._fds.extend([child_r, child_w])
+            self.pid = util.spawnv_passfds(spawn.get_executable(), cmd, self._fds)
+            self.sentinel = parent_r
+            with open(parent_w, "wb", closefd=False) as f:
+                f.write(fp.getbuffer())
+        finally:
+            fds_to_close = [fd for fd in (parent_r, parent_w) if fd is not None]
+            self.finalizer = util.Finalize(self, util.close_fds, fds_to_close)
+            for fd in (child_r, child_w):
+                if fd is not None:
+                    os.close(fd)
+
+
+class _WorkerProcess(SpawnProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        return _WorkerPopen(process_obj)
+
+
+class _WorkerContext(SpawnContext):
+    Process = _WorkerProcess
+
+
+def get_pool():
+    """Shared process pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a multi-threaded server process is unsafe.
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS or os.cpu_count(),
+                mp_context=_WorkerContext(),
+            )
+        return _pool
+
+
+def partition(df, mode="order", n_parts=None):
+    """
+    Split df by order year, or by hash of Order ID into n_parts, keeping
+    only the columns the partials read.
+    """
+    if mode not in PARTITION_MODES:
+        raise ValueError(f"Unknown partition mode: {mode}")
+    if mode == "year":
+        years = df["Order Year"] if "Order Year" in df.columns else df["Order Date"].dt.year
+        keys = years.to_numpy()
+    else:
+        n_parts = n_parts or MAX_WORKERS or os.cpu_count()
+        keys = pd.util.hash_pandas_object(df["Order ID"], index=False).to_numpy() % n_parts
+
+    needed = set(CUBE_DIMENSIONS) | set(TIMESERIES_DIMENSIONS) | set(MEASURES)
+    needed |= {PRODUCT_COLUMN, "Order ID", "Order Date"}
+    columns = [col for col in df.columns if col in needed]
+    order = np.argsort(keys, kind="stable")
+    bounds = np.flatnonzero(np.diff(keys[order])) + 1
+    view = df[columns]
+    return [view.take(rows) for rows in np.split(order, bounds)]
+
+
+def _merge_groups(frames):
+    # Same group in several partitions: add its partial sums.
+    merged = pd.concat(frames)
+    levels = list(range(merged.index.nlevels))
+    return merged.groupby(level=levels, observed=True, dropna=False, sort=False).sum()
+
+
+def merge_partials(partials, disjoint_orders):
+    """Combine partition partials into whole-dataset aggregates."""
+    sums = sum(p["sums"] for p in partials)
+    counts = sum(p["counts"] for p in partials)
+    if disjoint_orders:
+        n_orders = int(sum(p["orders"] for p in partials))
+    else:
+        n_orders = pd.Series(np.concatenate([p["orders"] for p in partials])).nunique()
+
+    return {
+        "totals": pd.DataFrame([sums, sums / counts, counts], index=["sum", "mean", "count"])[MEASURES],
+        "orders": n_orders,
+        "cube": _merge_groups([p["cube"] for p in partials]),
+        "products": _merge_groups([p["products"] for p in partials]),
+        "daily": _merge_groups([p["daily"] for p in partials]),
+        "moments": {
+            by: _merge_groups([p["moments"][by] for p in partials])
+            for by in partials[0]["moments"]
+        },
+    }
+
+
+def precompute(df, mode="order", min_rows=PARALLEL_MIN_ROWS):
+    """
+    Compute the shared aggregates behind the KPI, trend, category, region,
+    segment, product and correlation views in the process pool and seed
+    them for df.
+    Returns False when df is too small, unversioned or already aggregated.
+    """
+    if mode not in PARTITION_MODES:
+        raise ValueError(f"Unknown partition mode: {mode}")
+    if len(df) < min_rows or dataset_version(df) is None or has_result(df, ("cube",)):
+        return False
+    disjoint_orders = mode == "order"
+    parts = partition(df, mode)
+    pool = get_pool()
+    partials = list(pool.map(partial_aggregates, parts, [disjoint_orders] * len(parts)))
+    merged = merge_partials(partials, disjoint_orders)
+
+    seed(df, ("totals",), merged["totals"])
+    seed(df, ("distinct", "Order ID"), merged["orders"])
+    seed(df, ("cube",), merged["cube"])
+    seed(df, ("product_table",), merged["products"])
+    seed(df, ("daily_store",), merged["daily"])
+    for by, moments in merged["moments"].items():
+        seed(df, ("moments", by), moments)
+    return True
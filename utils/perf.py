@@ -0,0 +1,147 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from utils.aggregate import cache_stats
+from utils.registry import registry_info
+
+logger = logging.getLogger("sales_dashboard.perf")
+
+# ============================================================
+# ⏱️ Stage Timing
+# ============================================================
+
+_run = threading.local()
+
+
+def start_run():
+    """Forget the stages of the previous script run on this thread."""
+    _run.records = []
+    _run.depth = 0
+    _run.origin = time.perf_counter()
+
+
+def records():
+    """Stages recorded so far in this script run."""
+    return list(getattr(_run, "records", []))
+
+
+def _rss_bytes():
+    # Resident set size from /proc (Linux); None where unavailable.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _rows(obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, tuple):
+        sizes = [_rows(item) for item in obj]
+        return next((size for size in sizes if size is not None), None)
+    return None
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Time a block and record rows in/out and the change in resident memory.
+    Set the yielded dict's "rows_out" to report output rows.
+    """
+    if not hasattr(_run, "records"):
+        start_run()
+    record = {"name": name, "rows_in": rows_in, "rows_out": None, "depth": _run.depth}
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    _run.depth += 1
+    try:
+        yield record
+    finally:
+        _run.depth -= 1
+        end = time.perf_counter()
+        rss_after = _rss_bytes()
+        record["start_ms"] = (start - _run.origin) * 1000
+        record["duration_ms"] = (end - start) * 1000
+        record["mem_delta_mb"] = (
+            (rss_after - rss_before) / 1024 ** 2
+            if rss_before is not None and rss_after is not None else None
+        )
+        _run.records.append(record)
+        logger.info(json.dumps({"event": "stage", **record}))
+
+
+def timed(func):
+    """Decorator: record func(df, ...) as a stage named after the function."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        rows_in = _rows(args[0]) if args else None
+        with stage(func.__name__, rows_in) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = _rows(result)
+        return result
+    return wrapper
+
+
+# ============================================================
+# 📤 Export
+# ============================================================
+
+def chrome_trace(run_records=None):
+    """Stages as Chrome trace events (chrome://tracing, Perfetto)."""
+    run_records = records() if run_records is None else run_records
+    events = [
+        {
+            "name": r["name"],
+            "ph": "X",
+            "ts": r["start_ms"] * 1000,
+            "dur": r["duration_ms"] * 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {k: r[k] for k in ("rows_in", "rows_out", "mem_delta_mb")},
+        }
+        for r in run_records
+    ]
+    return json.dumps({"traceEvents": events})
+
+
+def performance_panel():
+    """Optional sidebar panel listing this run's stages."""
+    if not st.sidebar.checkbox("⏱️ Show performance panel", value=False):
+        return
+    run_records = sorted(records(), key=lambda r: r["start_ms"])
+    with st.sidebar.expander("Performance", expanded=True):
+        if not run_records:
+            st.info("No stages recorded in this run.")
+            return
+        table = pd.DataFrame(run_records)
+        table["name"] = ["· " * depth + name for depth, name in zip(table["depth"], table["name"])]
+        st.dataframe(
+            table[["name", "duration_ms", "rows_in", "rows_out", "mem_delta_mb"]]
+            .style.format({"duration_ms": "{:.1f}", "mem_delta_mb": "{:+.1f}"}, na_rep="–"),
+            hide_index=True,
+        )
+        top_level = table.loc[table["depth"] == 0, "duration_ms"].sum()
+        st.caption(f"Total instrumented time: {top_level:,.0f} ms")
+        shared = registry_info()
+        st.caption(
+            f"Shared datasets: {shared['entries']} ({shared['bytes'] / 1024 ** 2:,.0f} MB), "
+            f"held by {shared['sessions']} session(s)"
+        )
+        cached = cache_stats()
+        st.caption(
+            f"Cached aggregates: {cached['versions']} version(s) ({cached['bytes'] / 1024 ** 2:,.0f} MB), "
+            f"{cached['hits']:,} hits / {cached['misses']:,} misses"
+        )
+        st.download_button(
+            "Download trace (JSON)", chrome_trace(run_records),
+            file_name="dashboard_trace.json", mime="application/json",
+        )
@@ -0,0 +1,70 @@
+import numpy as np
+
+from utils.aggregate import memoized
+from utils.cube import build_cube, cube_stat
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+PRODUCT_COLUMN = "Product Name"
+
+
+# ============================================================
+# 🏆 Product Table & Top-k Selection
+# ============================================================
+
+def build_product_table(df):
+    """Sum, count and sum of squares of every measure per product."""
+    table = build_cube(df, [PRODUCT_COLUMN])
+    return table[table.index.notna()]
+
+
+def product_table(df):
+    """Product table for df, built once per dataset version and shared by the rankings."""
+    return memoized(df, ("product_table",), lambda: build_product_table(df))
+
+
+def product_stat(df, stat="sum"):
+    """One column per measure of stat for every product."""
+    return cube_stat(product_table(df), stat)
+
+
+def top_k(values, n, largest=True):
+    """
+    Positions of the n largest (or smallest) values, best first, selected
+    with argpartition instead of a full sort. Selected ties keep their order.
+    """
+    values = np.asarray(values, dtype="float64")
+    keys = -values if largest else values
+    # NaN never ranks: push it past every real value.
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    if n < len(keys):
+        candidates = np.sort(np.argpartition(keys, n)[:n])
+    else:
+        candidates = np.arange(len(keys))
+    order = candidates[np.argsort(keys[candidates], kind="stable")]
+    return order[np.isfinite(keys[order])]
+
+
+def ranked(frame, by, n, largest=True):
+    """The n best rows of frame by column `by`."""
+    return frame.iloc[top_k(frame[by].to_numpy(dtype="float64", na_value=np.nan), n, largest)]
+
+
+# ============================================================
+# 🌊 Heavy Hitters (chunked ingest)
+# ============================================================
+
+def prune_heavy_hitters(table, capacity, by="Sales"):
+    """
+    Keep the `capacity` largest groups of a running per-group table. Returns
+    (table, dropped): dropped is the largest `by` total discarded, which
+    bounds how much any kept group may be undercounted by this prune.
+    """
+    if table is None or len(table) <= capacity:
+        return table, 0.0
+    keep = np.sort(top_k(table[by].to_numpy(), capacity))
+    dropped = np.ones(len(table), dtype=bool)
+    dropped[keep] = False
+    return table.iloc[keep], float(table[by].to_numpy()[dropped].max())
@@ -1,5 +1,8 @@
 import pandas as pd
 import numpy as np
+from utils.distinct import distinct_count
+from utils.logistics import LATE_RATE_ALERT, SHIP_TARGET_DAYS
+from utils.perf import timed
 from utils.calculate import (
     best_selling_month,
     discount_to_sales_ratio,
@@ -8,8 +11,10 @@ from utils.calculate import (
     best_segment,
     detect_outliers,
     loss_drivers,
+    shipping_summary,
 )
 
+@timed
 def generate_recommendations(df, month_sales, discount_ratio):
     recs = []
 
@@ -53,7 +58,7 @@ def generate_recommendations(df, month_sales, discount_ratio):
         pass
 
     # 6️⃣ Outlier Warnings
-    total_products = df["Product Name"].nunique()
+    total_products = distinct_count(df, "Product Name")
 
     outlier_df = detect_outliers(df)
     if not outlier_df.empty:
@@ -70,4 +75,16 @@ def generate_recommendations(df, month_sales, discount_ratio):
             f"consistently generate negative profit — review supplier costs or remove them from promotion."
         )
 
+    # 8️⃣ Shipping Delays
+    if "Ship Mode" in df.columns:
+        shipping = shipping_summary(df, "Ship Mode").dropna(subset=["Late Rate"])
+        if not shipping.empty:
+            worst = shipping.loc[shipping["Late Rate"].idxmax()]
+            target = SHIP_TARGET_DAYS.get(worst["Ship Mode"])
+            if worst["Late Rate"] > LATE_RATE_ALERT and target is not None:
+                recs.append(
+                    f"🚚 **{worst['Late Rate']:.0%}** of `{worst['Ship Mode']}` shipments leave later than the "
+                    f"{target}-day target — review carrier capacity or the promised delivery window."
+                )
+
     return recs
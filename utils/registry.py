@@ -0,0 +1,184 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from utils.aggregate import dataset_version, stamp_version
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Datasets kept for all sessions of this process; unreferenced ones are
+# evicted first (least recently used) when a limit is exceeded.
+REGISTRY_MAX_ENTRIES = 8
+REGISTRY_MAX_BYTES = 2 * 1024 ** 3
+
+# An unreferenced dataset is dropped after this long without use.
+IDLE_SECONDS = 15 * 60
+
+# Browser tabs close without notice: a session that hasn't rerun for this
+# long no longer holds its dataset.
+SESSION_TTL = 30 * 60
+
+# Cleaned uploads at least this large are written to an Arrow file and
+# memory-mapped, so every session reads the same OS page cache.
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), "sales_dashboard")
+SPOOL_MIN_BYTES = 32 * 1024 ** 2
+
+
+# ============================================================
+# 🗂️ Shared Dataset Registry
+# ============================================================
+
+_entries = OrderedDict()
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get(key):
+    """Registered frame for key, or None. The frame is shared: treat it as read-only."""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        entry["last_used"] = time.monotonic()
+        _entries.move_to_end(key)
+        return entry["df"]
+
+
+def put(key, df, path=None):
+    """Register df under key (path: its spooled file, removed on eviction)."""
+    nbytes = int(df.memory_usage(deep=True).sum())
+    with _lock:
+        _entries[key] = {
+            "df": df, "nbytes": nbytes, "path": path,
+            "holders": {}, "last_used": time.monotonic(),
+        }
+        _entries.move_to_end(key)
+        _evict(time.monotonic())
+    return df
+
+
+def write_table(table, path):
+    """Write an Arrow table to path as an uncompressed Feather file, atomically."""
+    # Write a uniquely named file beside path, then rename it over path, so
+    # concurrent readers never see a partial file and writers never share one.
+    tmp = tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".",
+        suffix=".tmp", delete=False,
+    )
+    try:
+        with tmp:
+            feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+def spool(key, df):
+    """
+    Write df to an Arrow file under SPOOL_DIR and return it memory-mapped:
+    columns are zero-copy, read-only views of the file. Returns (df, path).
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    path = os.path.join(SPOOL_DIR, f"{key}.feather")
+    write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+    mapped = feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+    mapped.attrs.update(df.attrs)
+    return mapped, path
+
+
+def checkout(df, session_id):
+    """
+    Hold df's dataset for a session and return the session's view of it:
+    a shallow copy sharing every column buffer, under the same version.
+    Writes to a view are copied on write and never reach the shared frame
+    (copy-on-write is always on from pandas 3, the pinned minimum).
+    """
+    key = dataset_version(df)
+    now = time.monotonic()
+    with _lock:
+        previous = _sessions.get(session_id)
+        if previous is not None and previous != key and previous in _entries:
+            _entries[previous]["holders"].pop(session_id, None)
+        _sessions[session_id] = key
+        entry = _entries.get(key)
+        if entry is not None:
+            entry["holders"][session_id] = now
+            entry["last_used"] = now
+        _evict(now)
+    if key is None:
+        return df
+    view = df.copy(deep=False)
+    view.attrs = dict(df.attrs)
+    return stamp_version(view, key)
+
+
+def release(session_id):
+    """Drop a session's hold on its dataset."""
+    with _lock:
+        key = _sessions.pop(session_id, None)
+        if key in _entries:
+            _entries[key]["holders"].pop(session_id, None)
+
+
+def _drop(key):
+    entry = _entries.pop(key)
+    if entry["path"] is not None:
+        # Views still mapping the file keep its pages until they go away.
+        try:
+            os.remove(entry["path"])
+        except OSError as e:
+            logger.warning("could not remove spooled dataset %s: %s", entry["path"], e)
+
+
+def _evict(now):
+    # Callers hold _lock.
+    for entry in _entries.values():
+        stale = [sid for sid, seen in entry["holders"].items() if now - seen > SESSION_TTL]
+        for sid in stale:
+            del entry["holders"][sid]
+            _sessions.pop(sid, None)
+
+    for key in [k for k, e in _entries.items() if not e["holders"] and now - e["last_used"] > IDLE_SECONDS]:
+        _drop(key)
+
+    total = sum(e["nbytes"] for e in _entries.values())
+    newest = next(reversed(_entries), None)
+    # Over a limit: drop unreferenced datasets, least recently used first.
+    # The newest dataset stays even if it alone exceeds the budget.
+    for key in [k for k, e in _entries.items() if not e["holders"] and k != newest]:
+        if len(_entries) <= REGISTRY_MAX_ENTRIES and total <= REGISTRY_MAX_BYTES:
+            break
+        total -= _entries[key]["nbytes"]
+        _drop(key)
+
+
+def clear_registry():
+    """Drop every registered dataset and session hold."""
+    with _lock:
+        for key in list(_entries):
+            _drop(key)
+        _sessions.clear()
+
+
+def registry_info():
+    """Registered datasets, their total size in bytes and the sessions holding them."""
+    with _lock:
+        return {
+            "entries": len(_entries),
+            "bytes": sum(e["nbytes"] for e in _entries.values()),
+            "sessions": sum(len(e["holders"]) for e in _entries.values()),
+        }
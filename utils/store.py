@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+
+from utils import registry
+from utils.aggregate import MEASURES, stamp_version
+from utils.correlation import CORRELATION_GROUPS
+from utils.cube import CUBE_DIMENSIONS
+from utils.dialect import DATE_COLUMNS, read_csv_bytes
+from utils.distinct import DISTINCT_COLUMNS, DISTINCT_GROUPS, PERIOD_GROUP
+from utils.geo import CITY_COLUMN, COUNTRY_COLUMN, POSTAL_COLUMN, STATE_COLUMN
+from utils.load import COLUMN_GROUPS, DERIVED_COLUMNS, REQUIRED_COLUMNS, dataset_key, preprocess
+from utils.logistics import LOGISTICS_GROUPS
+from utils.outliers import OUTLIER_GROUPS
+from utils.perf import stage
+from utils.ranking import PRODUCT_COLUMN
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+METADATA_KEY = b"sales_dashboard"
+
+# Bumped when preprocessing changes what a conversion contains; older files
+# are converted again.
+FORMAT_VERSION = 4
+
+# Columns the dashboard tabs and calculations read, gathered from the
+# modules that read them (filters use cube and logistics groups, forecasts
+# correlation groups); everything else, e.g. Customer Name or Product ID,
+# stays on disk. "Row ID" keys appended rows (see utils.append).
+DASHBOARD_COLUMNS = list(dict.fromkeys([
+    "Row ID", *DATE_COLUMNS, *MEASURES, *CUBE_DIMENSIONS,
+    *DISTINCT_COLUMNS.values(), *(group for group in DISTINCT_GROUPS if group != PERIOD_GROUP),
+    *CORRELATION_GROUPS, *LOGISTICS_GROUPS, *OUTLIER_GROUPS, PRODUCT_COLUMN,
+    COUNTRY_COLUMN, STATE_COLUMN, CITY_COLUMN, POSTAL_COLUMN,
+    *DERIVED_COLUMNS,
+]))
+
+
+# ============================================================
+# 💾 Columnar Files
+# ============================================================
+
+def columnar_path(csv_path, compact=False):
+    """Location of the converted copy of a CSV file."""
+    root, _ = os.path.splitext(csv_path)
+    return f"{root}.compact.feather" if compact else f"{root}.feather"
+
+
+def write_columnar(df, path, source=None):
+    """
+    Write a preprocessed frame as an uncompressed Arrow IPC (Feather v2) file,
+    which can be memory-mapped on read. The schema metadata records the
+    dtypes, the COLUMN_GROUPS present and the source file details.
+    """
+    meta = {
+        "schema": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "column_groups": {
+            group: [c for c in cols if c in df.columns]
+            for group, cols in COLUMN_GROUPS.items()
+        },
+        "rows": len(df),
+        "format": FORMAT_VERSION,
+        **(source or {}),
+    }
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        METADATA_KEY: json.dumps(meta).encode(),
+    })
+    registry.write_table(table, path)
+    return meta
+
+
+def read_metadata(path):
+    """Dashboard metadata stored in a columnar file (reads the footer only)."""
+    with pa.memory_map(path) as source:
+        schema = pa.ipc.open_file(source).schema
+    return json.loads(schema.metadata[METADATA_KEY])
+
+
+def ingest_csv(csv_path, encoding=None, compact=False, out_path=None):
+    """Validate, preprocess and convert a CSV once. Returns the output path."""
+    out_path = out_path or columnar_path(csv_path, compact)
+    with open(csv_path, "rb") as f:
+        raw_bytes = f.read()
+
+    df, dialect = read_csv_bytes(raw_bytes, encoding)
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    df = preprocess(df, compact=compact, date_format=dialect["date_format"])
+
+    stat = os.stat(csv_path)
+    write_columnar(df, out_path, source={
+        "source_key": dataset_key(raw_bytes, encoding=encoding, compact=compact),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+    })
+    return out_path
+
+
+def is_fresh(csv_path, path):
+    """True if path holds a conversion of the current contents of csv_path."""
+    if not os.path.exists(path):
+        return False
+    try:
+        meta = read_metadata(path)
+    except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+        return False
+    stat = os.stat(csv_path)
+    return (meta.get("format"), meta.get("source_size"), meta.get("source_mtime_ns")) == (
+        FORMAT_VERSION, stat.st_size, stat.st_mtime_ns,
+    )
+
+
+def load_columnar(path, columns=None):
+    """
+    Read a converted dataset, memory-mapped and limited to columns (those not
+    in the file are skipped). The frame is cached and shared: treat it as read-only.
+    """
+    meta = read_metadata(path)
+    if columns is not None:
+        columns = [col for col in columns if col in meta["schema"]]
+    key = f"{meta['source_key']}:{','.join(columns) if columns is not None else '*'}"
+
+    df = registry.get(key)
+    if df is None:
+        with stage("load_columnar") as record:
+            # split_blocks keeps numeric columns as zero-copy views of the mapping.
+            table = feather.read_table(path, columns=columns, memory_map=True)
+            df = table.to_pandas(split_blocks=True)
+            record["rows_out"] = len(df)
+        # Coverage reflects the file, not the projected columns.
+        df.attrs["column_groups"] = meta["column_groups"]
+        stamp_version(df, key)
+        registry.put(key, df)
+    return df
+
+
+def load_converted(csv_path, encoding=None, compact=False, columns=None):
+    """Load a CSV through its columnar copy, converting it first if missing or stale."""
+    path = columnar_path(csv_path, compact)
+    if not is_fresh(csv_path, path):
+        ingest_csv(csv_path, encoding=encoding, compact=compact, out_path=path)
+    return load_columnar(path, columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert sales CSVs to the dashboard's columnar format.")
+    parser.add_argument("csv_paths", nargs="+")
+    parser.add_argument("--encoding", default=None)
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+    for csv_path in args.csv_paths:
+        print(ingest_csv(csv_path, encoding=args.encoding, compact=args.compact))
@@ -0,0 +1,183 @@
+import pandas as pd
+import streamlit as st
+
+from utils.aggregate import MEASURES
+from utils.dialect import pandas_options, sniff_file
+from utils.distinct import build_sketch, merge_sketches, month_ordinals, sketch_counts
+from utils.load import REQUIRED_COLUMNS, preprocess
+from utils.ranking import prune_heavy_hitters
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Rows parsed per chunk; peak memory scales with this, not the file size.
+CHUNK_ROWS = 200_000
+
+# Running per-group totals kept while streaming: name -> grouping column.
+STREAM_GROUPS = {
+    "category": "Category",
+    "region": "Region",
+    "product": "Product Name",
+}
+
+# Products kept while streaming uploads; the smallest by sales are dropped
+# beyond this, so huge catalogs don't grow the running totals without bound.
+PRODUCT_CAPACITY = 50_000
+
+# Streamed uploads count distinct orders with a HyperLogLog sketch instead
+# of keeping every Order ID in a set.
+STREAM_DISTINCT_MODE = "hll"
+
+
+# ============================================================
+# 🌊 Chunked Ingest
+# ============================================================
+
+def read_header(file, encoding=None, **options):
+    """Column names from the header line, without parsing any rows."""
+    start = file.tell()
+    columns = list(pd.read_csv(file, nrows=0, encoding=encoding, **options).columns)
+    file.seek(start)
+    return columns
+
+
+def new_accumulator(product_capacity=None, distinct_mode="exact"):
+    """
+    Empty running aggregates for fold_chunk(). With product_capacity, only
+    the heaviest products by sales are tracked (approximate top products).
+    distinct_mode "hll" keeps a sketch of Order IDs instead of the set.
+    """
+    acc = {"rows": 0, "sums": None, "counts": None, "trend": None}
+    acc.update({name: None for name in STREAM_GROUPS})
+    acc.update({"product_capacity": product_capacity, "product_error": 0.0})
+    acc.update({"distinct_mode": distinct_mode, "orders": set() if distinct_mode == "exact" else None})
+    return acc
+
+
+def distinct_orders(acc):
+    """Distinct Order IDs folded so far (estimated in "hll" mode)."""
+    if acc["distinct_mode"] == "hll":
+        return int(sketch_counts(acc["orders"]).iloc[0]) if acc["orders"] is not None else 0
+    return len(acc["orders"])
+
+
+def _add(total, partial):
+    return partial if total is None else total.add(partial, fill_value=0)
+
+
+def merge_groups(total, partial):
+    """
+    Add per-group partial sums into total, touching only the groups in
+    partial. total is updated in place unless new groups have to be added.
+    Both frames must hold float64 columns in the same order.
+    """
+    if total is None:
+        return partial.copy()
+    positions = total.index.get_indexer(partial.index)
+    known = positions >= 0
+    if known.any():
+        rows = positions[known]
+        total.iloc[rows] = total.iloc[rows].to_numpy() + partial.to_numpy()[known]
+    if not known.all():
+        total = pd.concat([total, partial[~known]])
+    return total
+
+
+def fold_chunk(acc, chunk):
+    """Fold one preprocessed chunk into the running aggregates."""
+    acc["rows"] += len(chunk)
+    acc["sums"] = _add(acc["sums"], chunk[MEASURES].sum())
+    acc["counts"] = _add(acc["counts"], chunk[MEASURES].count())
+    if acc["distinct_mode"] == "hll":
+        acc["orders"] = merge_sketches(acc["orders"], build_sketch(chunk, "Order ID"))
+    else:
+        acc["orders"].update(chunk["Order ID"].unique())
+
+    monthly = chunk[MEASURES].groupby(month_ordinals(chunk)).sum().astype("float64")
+    monthly.index = pd.PeriodIndex.from_ordinals(monthly.index, freq="M", name="Order Date")
+    acc["trend"] = merge_groups(acc["trend"], monthly)
+
+    for name, col in STREAM_GROUPS.items():
+        if col in chunk.columns:
+            groups = chunk.groupby(col, observed=True)
+            partial = groups[MEASURES].sum().assign(Rows=groups.size()).astype("float64")
+            acc[name] = merge_groups(acc[name], partial)
+
+    if acc["product_capacity"] and acc["product"] is not None:
+        acc["product"], dropped = prune_heavy_hitters(acc["product"], acc["product_capacity"])
+        # Any kept product's sales are low by at most the sum of dropped maxima.
+        acc["product_error"] += dropped
+    return acc
+
+
+def finalize(acc):
+    """Turn running aggregates into the KPI dict and summary frames."""
+    sums, counts = acc["sums"], acc["counts"]
+    summary = {
+        "rows": acc["rows"],
+        "kpis": {
+            "total_sales": sums["Sales"],
+            "total_profit": sums["Profit"],
+            "avg_discount": sums["Discount"] / counts["Discount"] if counts["Discount"] else 0,
+            "total_orders": distinct_orders(acc),
+        },
+    }
+
+    trend = acc["trend"].sort_index()
+    trend.index = trend.index.astype(str)
+    summary["trend"] = trend.rename_axis("Order Date").reset_index()
+
+    for name in STREAM_GROUPS:
+        if acc[name] is not None:
+            summary[name] = acc[name].sort_values("Sales", ascending=False).reset_index()
+    summary["product_error"] = acc["product_error"]
+    return summary
+
+
+def stream_csv(file, chunksize=CHUNK_ROWS, encoding=None, on_progress=None,
+               product_capacity=None, distinct_mode="exact"):
+    """
+    Aggregate a CSV chunk by chunk, in the dialect sniffed from its start.
+    The header is checked before any rows are parsed. on_progress(rows,
+    position) is called after each chunk with the rows processed and the
+    byte offset reached.
+    """
+    dialect = sniff_file(file, encoding)
+    options = pandas_options(dialect)
+    columns = read_header(file, **options)
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    acc = new_accumulator(product_capacity, distinct_mode)
+    for chunk in pd.read_csv(file, chunksize=chunksize, **options):
+        fold_chunk(acc, preprocess(chunk, date_format=dialect["date_format"]))
+        if on_progress:
+            on_progress(acc["rows"], file.tell())
+
+    if acc["rows"] == 0:
+        raise ValueError("No valid rows found in the file.")
+    return finalize(acc)
+
+
+def load_streaming(uploaded_file):
+    """Stream an upload into st.session_state["stream_summary"], with progress."""
+    cached = st.session_state.get("stream_summary")
+    if cached is not None and cached["file_id"] == uploaded_file.file_id:
+        return cached["summary"]
+
+    size = max(uploaded_file.size, 1)
+    progress = st.sidebar.progress(0.0, text="Reading rows…")
+
+    def on_progress(rows, position):
+        progress.progress(min(position / size, 1.0), text=f"{rows:,} rows processed")
+
+    uploaded_file.seek(0)
+    summary = stream_csv(
+        uploaded_file, on_progress=on_progress,
+        product_capacity=PRODUCT_CAPACITY, distinct_mode=STREAM_DISTINCT_MODE,
+    )
+    progress.progress(1.0, text=f"✅ {summary['rows']:,} rows aggregated")
+    st.session_state["stream_summary"] = {"file_id": uploaded_file.file_id, "summary": summary}
+    return summary
@@ -0,0 +1,58 @@
+from utils.aggregate import memoized
+from utils.cube import build_cube, cube_stat
+
+# ============================================================
+# ✅ Configuration
+# ============================================================
+
+# Dimensions kept next to each day; anything coarser is rolled up from them.
+TIMESERIES_DIMENSIONS = ["Category", "Region", "Segment"]
+
+DAY_COLUMN = "Order Day"
+
+# Period frequencies the daily buckets roll up to.
+FREQUENCIES = {
+    "Daily": "D",
+    "Weekly": "W",
+    "Monthly": "M",
+    "Quarterly": "Q",
+    "Yearly": "Y",
+}
+
+
+# ============================================================
+# 📆 Daily Buckets
+# ============================================================
+
+def build_daily_store(df):
+    """
+    Sum, count and sum of squares of every measure per order day and
+    TIMESERIES_DIMENSIONS combination, in one pass over the rows.
+    """
+    dims = [col for col in TIMESERIES_DIMENSIONS if col in df.columns]
+    days = df.assign(**{DAY_COLUMN: df["Order Date"].dt.normalize()})
+    return build_cube(days, [DAY_COLUMN, *dims])
+
+
+def daily_store(df):
+    """Daily buckets for df, built once per dataset version."""
+    return memoized(df, ("daily_store",), lambda: build_daily_store(df))
+
+
+def timeseries(df, freq="M", dims=(), stat="sum"):
+    """
+    Roll the daily buckets up to periods of freq ("D", "W", "M", "Q", "Y"),
+    optionally split by dims, and return one column per measure. The period
+    level is named "Order Date".
+    """
+    dims = [dims] if isinstance(dims, str) else list(dims)
+
+    def compute():
+        store = daily_store(df)
+        days = store.index.get_level_values(DAY_COLUMN)
+        keys = [days.to_period(freq).rename("Order Date")]
+        keys += [store.index.get_level_values(dim) for dim in dims]
+        return store.groupby(keys, observed=True).sum()
+
+    level = memoized(df, ("timeseries", freq, tuple(dims)), compute)
+    return cube_stat(level, stat)